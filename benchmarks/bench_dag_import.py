@@ -0,0 +1,84 @@
+"""
+DAG-parse startup benchmark.
+
+The Airflow scheduler re-imports dags/churn_pipeline_dag.py on every parse loop, so
+everything the DAG file imports from src/ is paid for again and again. This measures,
+in fresh Python processes, the import time of what the DAG loads from src/
+and fails if any heavy library (pandas, sklearn, xgboost, mlflow, matplotlib, ...) was
+pulled in; those must only be imported when a task runs.
+
+With --dag the DAG file itself is executed (needs Airflow installed); modules already
+loaded by Airflow's own imports are not counted against the DAG.
+
+Usage:
+    python benchmarks/bench_dag_import.py
+    python benchmarks/bench_dag_import.py --repeat 20 --dag
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DAG_FILE = os.path.join(PROJECT_ROOT, "dags", "churn_pipeline_dag.py")
+
+# Top-level packages that must not be imported while parsing the DAG
+HEAVY_MODULES = [
+    "pandas", "numpy", "pyarrow", "sklearn", "xgboost", "mlflow", "matplotlib",
+    "seaborn", "requests", "aiohttp", "dvc", "joblib",
+]
+
+# Run in a fresh interpreter; prints {"seconds": ..., "modules": ..., "heavy": [...]}
+PROBE = """
+import sys, json, time
+{setup}
+baseline = set(sys.modules)
+start = time.perf_counter()
+{target}
+seconds = time.perf_counter() - start
+loaded = set(sys.modules) - baseline
+heavy = sorted({{m.split(".")[0] for m in loaded}} & set({heavy!r}))
+print(json.dumps({{"seconds": seconds, "modules": len(loaded), "heavy": heavy}}))
+"""
+
+TARGETS = {
+    "stages": ("", "import src.pipeline.stages\nimport src.ingestion.sources"),
+    "dag": ("import airflow\nfrom airflow import DAG\nfrom airflow.operators.python import PythonOperator",
+            f"import runpy\nrunpy.run_path({DAG_FILE!r})"),
+}
+
+
+def probe(target):
+    setup, code = TARGETS[target]
+    script = PROBE.format(setup=setup, target=code, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import cost of parsing the churn DAG")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh processes per target")
+    parser.add_argument("--dag", action="store_true", help="also execute the DAG file (needs Airflow)")
+    args = parser.parse_args()
+
+    targets = ["stages"] + (["dag"] if args.dag else [])
+    failed = False
+    for target in targets:
+        runs = [probe(target) for _ in range(args.repeat)]
+        times = [r["seconds"] * 1000 for r in runs]
+        heavy = sorted({m for r in runs for m in r["heavy"]})
+        print(f"{target:<8} median={statistics.median(times):8.2f} ms  min={min(times):8.2f} ms  "
+              f"modules={runs[0]['modules']:<5} heavy={heavy or 'none'}")
+        failed = failed or bool(heavy)
+
+    if failed:
+        print("❌ Heavy modules are imported at DAG parse time; move them inside the task functions")
+        sys.exit(1)
+    print("✅ DAG parse path is free of heavy imports")
+
+
+if __name__ == "__main__":
+    main()
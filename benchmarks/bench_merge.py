@@ -0,0 +1,97 @@
+"""
+Benchmark: in-memory vs streaming merge of raw churn files.
+
+Replicates Telco-Customer-Churn.csv at 1x, 10x and 100x, splits it into a
+"CSV" source and an "API" source with a slightly different column layout,
+and times both merge paths. Every merge runs in a fresh Python process (working
+directory = the temporary work dir) whose peak RSS is reported: unlike tracemalloc
+this includes pyarrow / native allocations, and no run inherits another's peak.
+
+Usage:
+    python benchmarks/bench_merge.py [--scales 1 10 100] [--chunksize 100000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SOURCE_CSV = os.path.join(PROJECT_ROOT, "Telco-Customer-Churn.csv")
+
+
+def make_raw_files(work_dir, scale):
+    """Write a scaled CSV source and an API-like source with reordered/missing columns."""
+    base = pd.read_csv(SOURCE_CSV)
+    scaled = pd.concat([base] * scale, ignore_index=True)
+    half = len(scaled) // 2
+
+    raw_dir = os.path.join(work_dir, "raw_data")
+    os.makedirs(raw_dir, exist_ok=True)
+    csv_path = os.path.join(raw_dir, "raw_churn_csv_bench.csv")
+    api_path = os.path.join(raw_dir, "raw_churn_api_bench.csv")
+
+    scaled.iloc[:half].to_csv(csv_path, index=False)
+    api_part = scaled.iloc[half:].drop(columns=["PaperlessBilling"])
+    api_part = api_part[list(reversed(api_part.columns))]
+    api_part.to_csv(api_path, index=False)
+    return [csv_path, api_path]
+
+
+# Run in a fresh interpreter inside the work dir (ingest uses paths relative to it)
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+from src.ingestion import ingest
+
+def rss_mb(field):
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field)) / 1024
+
+baseline = rss_mb("VmRSS:")
+start = time.perf_counter()
+ingest.merge_all(streaming={streaming}, chunksize={chunksize}, paths={files!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "baseline_mb": baseline, "peak_mb": rss_mb("VmHWM:")}}))
+"""
+
+
+def run_once(work_dir, files, streaming, chunksize):
+    """(seconds, RSS after imports in MB, peak RSS in MB) of one merge in a child process."""
+    script = PROBE.format(root=PROJECT_ROOT, streaming=streaming, chunksize=chunksize, files=files)
+    out = subprocess.run([sys.executable, "-c", script], cwd=work_dir,
+                         capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return result["seconds"], result["baseline_mb"], result["peak_mb"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scale in args.scales:
+            files = make_raw_files(work_dir, scale)
+            for streaming in (False, True):
+                elapsed, baseline_mb, peak_mb = run_once(work_dir, files, streaming, args.chunksize)
+                rows.append({
+                    "scale": f"{scale}x",
+                    "mode": "streaming" if streaming else "in-memory",
+                    "seconds": round(elapsed, 3),
+                    "peak_rss_mb": round(peak_mb, 1),
+                    "merge_rss_mb": round(peak_mb - baseline_mb, 1),
+                })
+                print(rows[-1])
+
+    print()
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
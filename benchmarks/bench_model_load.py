@@ -0,0 +1,119 @@
+"""
+Model artifact cold-start benchmark: joblib pickle vs native bundle (src/modeling/artifacts.py).
+
+Fits the tree models of the pipeline on synthetic data, saves each one both as the
+pickle training used to write and as a native bundle (XGBoost .ubj, memory-mapped
+float32 tree arrays), then loads every artifact in fresh Python processes - like a
+newly started scoring worker - and reports import + load time, first-batch predict
+time, peak RSS (Linux /proc) and size on disk. Predictions of both artifacts are checked to match.
+
+Usage:
+    python benchmarks/bench_model_load.py
+    python benchmarks/bench_model_load.py --rows 50000 --trees 300 --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import shutil
+import subprocess
+import tempfile
+
+import joblib
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from xgboost import XGBClassifier
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.modeling.artifacts import save_bundle, load_model  # noqa: E402
+
+# Run in a fresh interpreter: loads one artifact and scores a batch
+PROBE = """
+import json, time
+start = time.perf_counter()
+{load}
+loaded = time.perf_counter()
+import numpy as np
+X = np.load({sample!r})
+model.predict_proba(X)
+predicted = time.perf_counter()
+# VmHWM, not ru_maxrss: the latter keeps the (larger) peak of the forking benchmark process
+with open("/proc/self/status") as f:
+    peak_rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+print(json.dumps({{"load_ms": (loaded - start) * 1000, "predict_ms": (predicted - loaded) * 1000,
+                  "peak_rss_mb": peak_rss_kb / 1024}}))
+"""
+LOADERS = {
+    "pickle": "import joblib\nmodel = joblib.load({path!r})",
+    "bundle": "from src.modeling.artifacts import load_model\nmodel = load_model({path!r})",
+}
+
+
+def build_models(trees):
+    """Same model settings as src/modeling/train.py:build_models()."""
+    return {
+        "RandomForest": RandomForestClassifier(n_estimators=trees, random_state=42, n_jobs=-1),
+        "GradientBoosting": GradientBoostingClassifier(random_state=42),
+        "XGBoost": XGBClassifier(eval_metric="logloss", random_state=42, n_estimators=trees),
+    }
+
+
+def artifact_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def probe(kind, path, sample):
+    script = PROBE.format(load=LOADERS[kind].format(path=path), sample=sample)
+    out = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run(args, X, y, work_dir):
+    """Fit, save and probe every model, with all artifacts under work_dir."""
+    sample = os.path.join(work_dir, "sample.npy")
+    np.save(sample, X[:args.batch].astype(np.float32))
+
+    print(f"{'model':<18}{'artifact':<9}{'size KiB':>10}{'load ms':>10}{'predict ms':>12}{'peak RSS MB':>13}")
+    for name, model in build_models(args.trees).items():
+        model.fit(X, y)
+        pickle_path = os.path.join(work_dir, f"{name}_churn_model.pkl")
+        joblib.dump(model, pickle_path)
+        bundle_path = save_bundle(model, name, bundle_dir=work_dir, preprocessor_path=None)
+
+        expected = model.predict_proba(X[:args.batch])[:, 1]
+        max_diff = np.abs(load_model(bundle_path).predict_proba(X[:args.batch])[:, 1] - expected).max()
+
+        for kind, path in (("pickle", pickle_path), ("bundle", bundle_path)):
+            runs = [probe(kind, path, sample) for _ in range(args.repeat)]
+            median = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+            print(f"{name:<18}{kind:<9}{artifact_size(path) / 1024:>10.1f}{median['load_ms']:>10.1f}"
+                  f"{median['predict_ms']:>12.1f}{median['peak_rss_mb']:>13.1f}")
+        print(f"{'':<18}max |p_bundle - p_model| = {max_diff:.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold model loading: pickle vs native bundle")
+    parser.add_argument("--rows", type=int, default=7000, help="training rows")
+    parser.add_argument("--features", type=int, default=45, help="features (about the one-hot width)")
+    parser.add_argument("--trees", type=int, default=100, help="trees for RandomForest / XGBoost")
+    parser.add_argument("--batch", type=int, default=1000, help="rows scored after loading")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per artifact")
+    args = parser.parse_args()
+
+    X, y = make_classification(args.rows, args.features, random_state=0, weights=[0.73])
+    work_dir = tempfile.mkdtemp(prefix="bench_model_load_")
+    try:
+        run(args, X, y, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Scaling benchmark of the churn pipeline on synthetic data (fully offline).
+
+For every --rows value a fresh working directory is filled with synthetic Telco
+data (benchmarks/synthetic.py) and each pipeline stage runs in its own Python
+process, so peak memory is per stage. Timings, CPU, peak RSS and rows come from
+the stage instrumentation (src/instrumentation/stage_metrics.py). The API source
+and DVC versioning are not used.
+
+Results are saved as benchmarks/results/<commit>_<timestamp>.json (git-ignored;
+--out picks another directory); pass an earlier result with --compare to see the
+change per stage and scale.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 10000 100000 1000000
+    python benchmarks/bench_pipeline.py --rows 10000 --stages preprocess train \\
+        --compare benchmarks/results/abc1234_20260101_120000.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+from synthetic import write_synthetic
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+# stage -> (code run in the stage process, name recorded by the instrumentation)
+STAGES = {
+    "ingest": ("from src.ingestion.ingest import ingest_csv, merge_all\n"
+               "ingest_csv('synthetic_churn.csv')\n"
+               "merge_all(streaming=True)", "ingest.merge"),
+    "validate": ("from src.validation.validate import validate\nvalidate()", "validate"),
+    "preprocess": ("from src.preprocessing.preprocess import preprocess\npreprocess()", "preprocess"),
+    "feature_engineering": ("from src.feature_engineering.features import feature_engineering\n"
+                            "feature_engineering()", "feature_engineering"),
+    "export": ("from src.feature_store.export import export_to_feast_csv\nexport_to_feast_csv()", "export"),
+    "train": ("from src.modeling.train import train_and_evaluate\ntrain_and_evaluate()", "train"),
+}
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def read_metrics(work_dir, stage_name):
+    path = os.path.join(work_dir, "reports", "metrics", "stage_metrics.jsonl")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    matching = [r for r in records if r["stage"] == stage_name]
+    return matching[-1] if matching else None
+
+
+def run_stage(work_dir, stage, timeout):
+    code, metric_name = STAGES[stage]
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, MLFLOW_TRACKING_URI=f"file://{work_dir}/mlruns")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env,
+                          capture_output=True, text=True, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    record = read_metrics(work_dir, metric_name) or {}
+    rows = record.get("rows_in") or record.get("rows_out")
+    return {
+        "stage": stage,
+        "status": "ok" if proc.returncode == 0 else "error",
+        "process_seconds": round(elapsed, 3),
+        "wall_seconds": record.get("wall_seconds"),
+        "cpu_seconds": record.get("cpu_seconds"),
+        "peak_rss_mb": round(record["peak_rss_bytes"] / 1024 ** 2, 1) if record.get("peak_rss_bytes") else None,
+        "rows": rows,
+        "rows_per_sec": round(rows / record["wall_seconds"], 1) if rows and record.get("wall_seconds") else None,
+        "error": proc.stderr[-2000:] if proc.returncode != 0 else None,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base = pd.DataFrame(baseline["results"]).set_index(["rows_total", "stage"])
+    current = pd.DataFrame(results).set_index(["rows_total", "stage"])
+    joined = current[["wall_seconds", "peak_rss_mb"]].join(
+        base[["wall_seconds", "peak_rss_mb"]], rsuffix="_base", how="inner")
+    joined["time_ratio"] = (joined["wall_seconds"] / joined["wall_seconds_base"]).round(3)
+    joined["memory_ratio"] = (joined["peak_rss_mb"] / joined["peak_rss_mb_base"]).round(3)
+    print(f"\nCompared with {baseline['commit']} ({baseline_path}); ratio > 1 means slower / more memory:")
+    print(joined.to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the churn pipeline on synthetic data")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=int, default=6 * 3600, help="Seconds per stage")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directories")
+    parser.add_argument("--compare", help="Earlier result file to compare with")
+    parser.add_argument("--out", default=RESULTS_DIR, help="Directory of the result file")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        work_dir = tempfile.mkdtemp(prefix=f"churn_bench_{rows}_")
+        print(f"▶ {rows} rows in {work_dir}")
+        write_synthetic(os.path.join(work_dir, "synthetic_churn.csv"), rows, seed=args.seed)
+        for stage in args.stages:
+            result = run_stage(work_dir, stage, args.timeout)
+            result["rows_total"] = rows
+            results.append(result)
+            print(f"  {stage:<20} {result['status']:<5} wall={result['wall_seconds']}s "
+                  f"rss={result['peak_rss_mb']}MB rows/s={result['rows_per_sec']}")
+            if result["status"] != "ok":
+                print(result["error"])
+                break  # later stages need this stage's output
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    commit = git_commit()
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"{commit}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "results": results,
+        }, f, indent=2)
+
+    print()
+    print(pd.DataFrame(results).drop(columns=["error"]).to_string(index=False))
+    print(f"\nResults saved at {out_path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,13 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.ingestion.ingest import ingest_csv, ingest_api, merge_all, run_dvc_versioning
-from src.validation.validate import validate
-from src.preprocessing.preprocess import preprocess
-from src.feature_engineering.features import feature_engineering
-from src.feature_store.export import export_to_feast_csv
-from src.modeling.train import train_and_evaluate
+# Every task goes through run_stage, which skips the stage when its inputs, code and
+# settings are unchanged since the last successful run (see src/pipeline/stages.py).
+# Set CHURN_FORCE_STAGES=1 to recompute everything.
+# run_stage imports a stage's module only when the task runs, so parsing this file does
+# not load pandas/sklearn/mlflow/...; keep it that way (benchmarks/bench_dag_import.py).
+from src.pipeline.stages import run_stage
+from src.ingestion.sources import source_names
 
 default_args = {
     'owner': 'airflow',
@@ -22,6 +23,13 @@ default_args = {
     'retries': 1,
 }
 
+
+def merge_raw_files(ti, ingest_task_ids):
+    """Merge the raw files returned (via XCom) by the per-source ingest tasks."""
+    raw_paths = [path for paths in ti.xcom_pull(task_ids=ingest_task_ids) for path in paths or []]
+    return run_stage("merge", stage_kwargs={"paths": raw_paths})
+
+
 with DAG(
     dag_id="churn_pipeline_dag",
     default_args=default_args,
@@ -30,63 +38,84 @@ with DAG(
 ) as dag:
 
     # --------------------------
-    # Task 1: Ingest CSV + API, merge, DVC versioning
+    # Task 1: Ingest each configured source in parallel (CSV, API, ...)
     # --------------------------
-    def ingest_merge_version():
-        ingest_csv()
-        ingest_api()
-        merge_all()
-        run_dvc_versioning()
+    ingest_tasks = [
+        PythonOperator(
+            task_id=f"ingest_{name}",
+            python_callable=run_stage,
+            op_kwargs={"name": "ingest", "stage_kwargs": {"names": [name]}},
+        )
+        for name in source_names()
+    ]
 
-    ingest_task = PythonOperator(
-        task_id="ingest_merge_version",
-        python_callable=ingest_merge_version,
+    # --------------------------
+    # Task 2: Merge the raw files
+    # --------------------------
+    merge_task = PythonOperator(
+        task_id="merge_raw_data",
+        python_callable=merge_raw_files,
+        op_kwargs={"ingest_task_ids": [task.task_id for task in ingest_tasks]},
+    )
+
+    # --------------------------
+    # Task 3: DVC versioning (off the critical path)
+    # --------------------------
+    version_task = PythonOperator(
+        task_id="dvc_version",
+        python_callable=run_stage,
+        op_kwargs={"name": "version"},
     )
 
     # --------------------------
-    # Task 2: Data validation
+    # Task 4: Data validation
     # --------------------------
     validate_task = PythonOperator(
         task_id="validate_data",
-        python_callable=validate,
+        python_callable=run_stage,
+        op_kwargs={"name": "validate"},
     )
 
     # --------------------------
-    # Task 3: Preprocessing
+    # Task 5: Preprocessing
     # --------------------------
     preprocess_task = PythonOperator(
         task_id="preprocess",
-        python_callable=preprocess,
+        python_callable=run_stage,
+        op_kwargs={"name": "preprocess"},
     )
 
     # --------------------------
-    # Task 4: Feature engineering
+    # Task 6: Feature engineering
     # --------------------------
     feature_engineering_task = PythonOperator(
         task_id="feature_engineering",
-        python_callable=feature_engineering,
+        python_callable=run_stage,
+        op_kwargs={"name": "feature_engineering"},
     )
 
     # --------------------------
-    # Task 5: Export features to Feast
+    # Task 7: Export features to Feast
     # --------------------------
     export_task = PythonOperator(
         task_id="export_to_feast_csv",
-        python_callable=export_to_feast_csv,
+        python_callable=run_stage,
+        op_kwargs={"name": "export"},
     )
 
     # --------------------------
-    # Task 6: Train models
+    # Task 8: Train models (reads the preprocessed data, not the feature table)
     # --------------------------
     train_task = PythonOperator(
         task_id="train_models",
-        python_callable=train_and_evaluate,
+        python_callable=run_stage,
+        op_kwargs={"name": "train"},
     )
 
     # --------------------------
-    # DAG dependencies
+    # DAG dependencies: only real data dependencies, so independent branches run
+    # concurrently (needs a parallel executor, see docker-compose.yaml)
     # --------------------------
-    ingest_task >> validate_task >> preprocess_task >> feature_engineering_task
+    ingest_tasks >> merge_task >> [version_task, validate_task]
+    validate_task >> preprocess_task >> [feature_engineering_task, train_task]
     feature_engineering_task >> export_task
-    feature_engineering_task >> train_task
-    export_task >> train_task  # optional: ensures export finishes before training
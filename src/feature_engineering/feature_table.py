@@ -0,0 +1,152 @@
+import uuid
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+TABLE = "customer_features"
+HISTORY_TABLE = f"{TABLE}_history"   # every written version, for point-in-time joins
+META_TABLE = "feature_table_meta"    # generation token of each table build
+KEY = "customerID"
+BATCH_ROWS = 10_000
+
+# WAL lets readers (feature export / serving) work while features are written;
+# synchronous=NORMAL is durable in WAL mode without an fsync per transaction.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",     # 64 MB page cache
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped I/O
+]
+
+
+def connect(db_path):
+    """Open the feature database with the tuned pragmas."""
+    con = sqlite3.connect(db_path)
+    for pragma in PRAGMAS:
+        con.execute(pragma)
+    return con
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _table_columns(con, table):
+    return [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')]
+
+
+def table_generation(con, table=TABLE):
+    """Token of the current build of `table` (a new one on every rebuild), or None if unknown."""
+    try:
+        row = con.execute(f'SELECT generation FROM "{META_TABLE}" WHERE table_name = ?', (table,)).fetchone()
+    except sqlite3.OperationalError:   # database written before generations were recorded
+        return None
+    return row[0] if row else None
+
+
+def _new_generation(con, table):
+    con.execute(f'CREATE TABLE IF NOT EXISTS "{META_TABLE}" '
+                f'(table_name TEXT PRIMARY KEY, generation TEXT NOT NULL, created_at TEXT NOT NULL)')
+    generation = uuid.uuid4().hex
+    con.execute(f'INSERT OR REPLACE INTO "{META_TABLE}" VALUES (?, ?, ?)',
+                (table, generation, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")))
+    return generation
+
+
+def ensure_table(con, df, table=TABLE, key=KEY):
+    """
+    Create the feature table with `key` as PRIMARY KEY (+ row_hash and updated_at).
+    Also keeps `<table>_history` with one row per (key, updated_at) version and an
+    increasing version_id (the change-log cursor of incremental exports). version_id
+    restarts when the tables are rebuilt, so every build gets a new generation token
+    in META_TABLE (see table_generation) that exports compare against.
+    The tables are rebuilt only if their feature columns differ from `df`.
+    """
+    history = f"{table}_history"
+    feature_cols = [c for c in df.columns if c != key]
+    expected = [key] + feature_cols + ["row_hash", "updated_at"]
+    existing = _table_columns(con, table)
+    if existing == expected and _table_columns(con, history) == ["version_id"] + expected:
+        if table_generation(con, table) is None:
+            _new_generation(con, table)
+        return False
+    if existing:
+        logger.info(f"Feature columns of {table} changed, rebuilding the table")
+    con.execute(f'DROP TABLE IF EXISTS "{table}"')
+    con.execute(f'DROP TABLE IF EXISTS "{history}"')
+
+    column_defs = ", ".join(f'"{c}" {_sql_type(df[c].dtype)}' for c in feature_cols)
+    con.execute(
+        f'CREATE TABLE "{table}" ("{key}" TEXT PRIMARY KEY, {column_defs}, '
+        f'row_hash INTEGER NOT NULL, updated_at TEXT NOT NULL)'
+    )
+    con.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_updated_at" ON "{table}" (updated_at)')
+    con.execute(
+        f'CREATE TABLE "{history}" (version_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+        f'"{key}" TEXT NOT NULL, {column_defs}, row_hash INTEGER NOT NULL, updated_at TEXT NOT NULL, '
+        f'UNIQUE ("{key}", updated_at))'
+    )
+    con.execute(f'CREATE INDEX IF NOT EXISTS "idx_{history}_updated_at" ON "{history}" (updated_at)')
+    _new_generation(con, table)
+    return True
+
+
+def row_hashes(df, key=KEY):
+    """Stable 64-bit content hash of every row's feature values."""
+    features = df.drop(columns=[key])
+    return pd.util.hash_pandas_object(features, index=False).to_numpy().view("int64")
+
+
+def upsert_features(df, con, table=TABLE, key=KEY, batch_rows=BATCH_ROWS):
+    """
+    Insert new customers and update changed ones in a single transaction.
+    Unchanged customers (same row hash) are not written; changed ones are also
+    appended to the history table. Returns the changed rows
+    (with their updated_at timestamp) and counts.
+    """
+    missing_key = df[key].isna()
+    if missing_key.any():
+        logger.warning(f"Skipping {int(missing_key.sum())} rows without {key}")
+    df = df[~missing_key].drop_duplicates(subset=[key], keep="last").reset_index(drop=True)
+    df[key] = df[key].astype(str)
+
+    with con:  # one transaction: commit on success, rollback on error
+        rebuilt = ensure_table(con, df, table, key)
+        df = df.assign(row_hash=row_hashes(df, key))
+
+        if rebuilt:
+            changed = df
+        else:
+            existing = pd.read_sql_query(f'SELECT "{key}", row_hash FROM "{table}"', con)
+            existing["row_hash"] = existing["row_hash"].astype("Int64")
+            merged = df[[key, "row_hash"]].merge(existing, on=key, how="left", suffixes=("", "_old"))
+            is_changed = (merged["row_hash"] != merged["row_hash_old"]).fillna(True)
+            changed = df[is_changed.to_numpy(dtype=bool)]
+
+        changed = changed.assign(updated_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        columns = list(changed.columns)
+        placeholders = ", ".join("?" for _ in columns)
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns if c != key)
+        sql = (f'INSERT INTO "{table}" ({quoted}) VALUES ({placeholders}) '
+               f'ON CONFLICT("{key}") DO UPDATE SET {updates}')
+        history_sql = f'INSERT OR REPLACE INTO "{table}_history" ({quoted}) VALUES ({placeholders})'
+
+        for start in range(0, len(changed), batch_rows):
+            batch = changed.iloc[start:start + batch_rows]
+            batch = batch.astype(object).where(batch.notna(), None)
+            rows = list(batch.itertuples(index=False, name=None))
+            con.executemany(sql, rows)
+            con.executemany(history_sql, rows)
+
+    logger.info(f"Upserted {len(changed)} of {len(df)} customers into {table}")
+    return changed
@@ -1,30 +1,43 @@
-import logging
-import pandas as pd
-import sqlite3
+import os
 
-logging.basicConfig(filename="ingestion.log", level=logging.INFO)
+from src.storage.intermediate import data_path
+from src.feature_engineering.feature_table import KEY, connect, upsert_features
+from src.feature_engineering.registry import compile_features
+from src.preprocessing.preprocess import ChurnPreprocessor
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_rows, record_files
 
-CLEAN_FILE = "data/processed/clean_churn.csv"
+logger = get_logger(__name__)
+
+CLEAN_FILE = data_path("data/processed/clean_churn")
+PREPROCESSOR_FILE = "models/preprocessor.joblib"
 TRANSFORMED_DB = "transformed_churn.db"
 
-def feature_engineering():
+@instrumented("feature_engineering")
+def feature_engineering(features=None):
     """
-    Create derived / aggregated features from preprocessed churn data
-    and store results in SQLite database.
+    Compute the features declared in registry.py (default: FEATURES) from the
+    preprocessed churn data and upsert them, together with every column of the
+    clean data (scaled numerics, one-hot columns, Churn), into the SQLite feature
+    table (keyed by customerID; only new or changed customers are written).
+    The registry is compiled into one vectorized plan; its numeric sources are
+    unscaled with the fitted preprocessor, so e.g. tenure is in months.
     """
     if not os.path.exists(CLEAN_FILE):
-        raise FileNotFoundError(f"Clean CSV not found: {CLEAN_FILE}")
-
-    df = pd.read_csv(CLEAN_FILE)
+        raise FileNotFoundError(f"Clean data not found: {CLEAN_FILE}")
 
-    # Example engineered features
-    df['total_spend'] = df['MonthlyCharges'] * df['tenure']
-    df['tenure_years'] = df['tenure'] / 12.0
-    df['long_term_customer'] = (df['tenure'] > 24).astype(int)
+    plan = compile_features(features)
+    scaling = ChurnPreprocessor.load(PREPROCESSOR_FILE).numeric_scaling()
+    df = plan.run(CLEAN_FILE, key=KEY, passthrough=True, scaling=scaling)
 
     # Save to SQLite
-    con = sqlite3.connect(TRANSFORMED_DB)
-    df.to_sql("customer_features", con, if_exists="replace", index=False)
-    con.close()
+    con = connect(TRANSFORMED_DB)
+    try:
+        changed = upsert_features(df, con)
+    finally:
+        con.close()
 
-    logging.info(f"Feature engineering complete. Loaded into {TRANSFORMED_DB}")
+    record_rows(rows_in=len(df), rows_out=len(changed))
+    record_files(read=[CLEAN_FILE, PREPROCESSOR_FILE])
+    logger.info(f"Feature engineering complete. {len(plan.features)} features, "
+                f"{len(changed)} customers updated in {TRANSFORMED_DB}")
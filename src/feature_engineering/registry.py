@@ -0,0 +1,177 @@
+"""
+Declarative feature registry.
+
+A feature is a name, a NumPy expression over source columns and/or other features,
+an output dtype and a description:
+
+    Feature("total_spend", "MonthlyCharges * tenure", "float32", "Monthly charges x tenure")
+
+compile_features() works out the dependencies from the expressions, orders them,
+and generates one Python function evaluating every feature over whole columns (no
+per-feature DataFrame pass). The plan knows which source columns it needs, so only
+those are read (column projection on parquet/feather), as float32 arrays.
+Expressions may use the functions in FUNCTIONS, e.g. group aggregates
+"group_mean(MonthlyCharges, Contract)" or "where(tenure > 24, 1, 0)".
+
+Given the preprocessor's scaling, standardized numeric sources are turned back into
+their original units first (tenure in months, charges in currency), so thresholds and
+products mean what they say. With passthrough, every other column of the data file
+(one-hot columns, the label) is kept unchanged next to the computed features.
+"""
+import ast
+import keyword
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.storage.intermediate import read_frame
+
+Feature = namedtuple("Feature", ["name", "expr", "dtype", "description"])
+
+RAW_DECIMALS = 3   # unscaled values are rounded to this, undoing float32 noise of the clean file
+
+FEATURES = [
+    Feature("total_spend", "MonthlyCharges * tenure", "float32", "Monthly charges x tenure"),
+    Feature("tenure_years", "tenure / 12.0", "float32", "Tenure in years"),
+    Feature("long_term_customer", "tenure > 24", "int8", "1 if tenure is above 24"),
+]
+
+
+def _group_reduce(values, keys, reducer):
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=values, minlength=counts.size)
+    return (sums / counts if reducer == "mean" else sums if reducer == "sum" else counts)[inverse]
+
+
+def group_mean(values, keys):
+    """Mean of `values` over the rows sharing each row's key (broadcast back to rows)."""
+    return _group_reduce(values, keys, "mean")
+
+
+def group_sum(values, keys):
+    """Sum of `values` over the rows sharing each row's key."""
+    return _group_reduce(values, keys, "sum")
+
+
+def group_count(keys):
+    """Number of rows sharing each row's key."""
+    return _group_reduce(np.ones(len(keys)), keys, "count").astype(np.float32)
+
+
+def rank_pct(values):
+    """Percentile rank (0..1] of every value."""
+    return pd.Series(values).rank(pct=True).to_numpy(dtype=np.float32)
+
+
+FUNCTIONS = {
+    "where": np.where, "log1p": np.log1p, "sqrt": np.sqrt, "abs": np.abs,
+    "clip": np.clip, "minimum": np.minimum, "maximum": np.maximum, "isnan": np.isnan,
+    "group_mean": group_mean, "group_sum": group_sum, "group_count": group_count,
+    "rank_pct": rank_pct,
+}
+
+
+def _cast(values, dtype):
+    if dtype == "category":
+        return pd.Categorical(values)
+    return np.asarray(values).astype(dtype, copy=False)
+
+
+def _source_array(series, scaling=None):
+    """
+    Compact array of a source column: numbers as float32, everything else unchanged.
+    `scaling` = (mean, scale) of a standardized column returns it in original units.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        if scaling is None:
+            return series.to_numpy(dtype=np.float32, na_value=np.nan)
+        mean, scale = scaling
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan) * scale + mean
+        return np.round(values, RAW_DECIMALS).astype(np.float32)
+    return series.to_numpy()
+
+
+class FeaturePlan:
+    """Compiled, dependency-ordered evaluation of a list of features."""
+
+    def __init__(self, features):
+        self.features = list(features)
+        by_name = {f.name: f for f in self.features}
+        if len(by_name) != len(self.features):
+            raise ValueError("Duplicate feature names in registry")
+
+        self.dependencies, sources = {}, set()
+        for feature in self.features:
+            if not feature.name.isidentifier() or keyword.iskeyword(feature.name) or feature.name in FUNCTIONS:
+                raise ValueError(f"Invalid feature name: {feature.name!r}")
+            names = {node.id for node in ast.walk(ast.parse(feature.expr, mode="eval"))
+                     if isinstance(node, ast.Name)} - set(FUNCTIONS)
+            # a name is another feature unless it is this feature's own name (then it is the source column)
+            self.dependencies[feature.name] = sorted(n for n in names if n in by_name and n != feature.name)
+            sources |= {n for n in names if n not in by_name or n == feature.name}
+        self.sources = sorted(sources)
+        self.order = self._topological_order(by_name)
+        self.source_code = self._generate()
+        namespace = {**FUNCTIONS, "np": np, "_cast": _cast}
+        exec(compile(self.source_code, "<feature_plan>", "exec"), namespace)
+        self._fn = namespace["_feature_plan"]
+
+    def _topological_order(self, by_name):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cyclic feature dependencies: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.dependencies[name]:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(by_name[name])
+
+        for feature in self.features:
+            visit(feature.name, [])
+        return order
+
+    def _generate(self):
+        lines = ["def _feature_plan(_columns):"]
+        lines += [f"    {name} = _columns[{name!r}]" for name in self.sources]
+        lines += [f"    {f.name} = _cast({f.expr}, {f.dtype!r})" for f in self.order]
+        lines.append("    return {" + ", ".join(f"{f.name!r}: {f.name}" for f in self.features) + "}")
+        return "\n".join(lines) + "\n"
+
+    def evaluate(self, columns):
+        """Feature arrays (in declaration order) from a mapping of source column arrays."""
+        missing = [c for c in self.sources if c not in columns]
+        if missing:
+            raise KeyError(f"Source columns missing for feature plan: {missing}")
+        return self._fn(columns)
+
+    def to_frame(self, df, key=None, passthrough=False, scaling=None):
+        """
+        DataFrame of `key` (if given) + every feature, computed from the columns of `df`.
+        passthrough=True also keeps every other column of `df` (before the features);
+        `scaling` maps standardized source columns to their (mean, scale).
+        """
+        scaling = scaling or {}
+        arrays = self.evaluate({c: _source_array(df[c], scaling.get(c)) for c in self.sources})
+        frame = pd.DataFrame(arrays, index=df.index)
+        if passthrough:
+            kept = [c for c in df.columns if c != key and c not in arrays]
+            frame = pd.concat([df[kept], frame], axis=1)
+        if key is not None:
+            frame.insert(0, key, df[key].to_numpy())
+        return frame.reset_index(drop=True)
+
+    def run(self, path, key=None, passthrough=False, scaling=None):
+        """Read the needed columns (all of them with passthrough) of a data file and compute the features."""
+        columns = None if passthrough else ([key] if key else []) + [c for c in self.sources if c != key]
+        return self.to_frame(read_frame(path, columns=columns), key=key, passthrough=passthrough,
+                             scaling=scaling)
+
+
+def compile_features(features=None):
+    """FeaturePlan for `features` (default: the FEATURES registry)."""
+    return FeaturePlan(FEATURES if features is None else features)
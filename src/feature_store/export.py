@@ -1,20 +1,125 @@
-import logging
+import os
+import json
 
-logging.basicConfig(filename="ingestion.log", level=logging.INFO)
+from src.storage.intermediate import data_path, FrameWriter, EXTENSIONS, STORAGE_FORMAT
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_rows
 
-def export_to_feast_csv():
+logger = get_logger(__name__)
+
+TRANSFORMED_DB = "transformed_churn.db"
+FEAST_FILE = data_path("transformed_churn")
+# Incremental export: date-partitioned files, feature_exports/date=YYYY-MM-DD/part-<run>.parquet
+EXPORT_DIR = "feature_exports"
+EXPORT_STATE_FILE = os.path.join(EXPORT_DIR, "_export_state.json")
+EXPORT_MODE = os.environ.get("CHURN_EXPORT_MODE", "incremental")   # "incremental" | "full"
+FETCH_ROWS = 50_000
+
+
+def _read_state(path=EXPORT_STATE_FILE):
+    if not os.path.exists(path):
+        return {"last_version_id": 0, "generation": None}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_state(state, path=EXPORT_STATE_FILE):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _iter_query(con, sql, params=(), fetch_rows=FETCH_ROWS):
+    """Stream a query result as DataFrame chunks through a cursor."""
+    import pandas as pd
+
+    cursor = con.execute(sql, params)
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(fetch_rows)
+        if not rows:
+            break
+        yield pd.DataFrame(rows, columns=columns)
+
+
+def export_incremental(con):
     """
-    Export engineered features from SQLite (transformed_churn.db)
-    to a CSV file (transformed_churn.csv) for the Feast feature store.
+    Append feature versions written since the last export to date-partitioned files.
+    The change log is the history table; its version_id is the high-water mark, so
+    every changed customer is exported exactly once, with its real event timestamp.
+    version_id restarts when the feature table is rebuilt: when the table's generation
+    token differs from the exported one, the old partitions are removed and the
+    history is exported again from the start.
     """
-    import sqlite3
-    import pandas as pd
+    import shutil
+    from contextlib import ExitStack
     from datetime import datetime
+    from src.feature_engineering.feature_table import table_generation
+
+    state = _read_state()
+    run_ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ext = EXTENSIONS[STORAGE_FORMAT]
+    writers = {}
+    last_version = state["last_version_id"]
+    generation = table_generation(con)
+    if generation != state.get("generation"):
+        logger.info(f"Feature table generation changed ({state.get('generation')} -> {generation}), "
+                    f"re-exporting all feature history")
+        for name in os.listdir(EXPORT_DIR):
+            if name.startswith("date="):
+                shutil.rmtree(os.path.join(EXPORT_DIR, name))
+        last_version = 0
+    # ExitStack closes every partition file on success and discards them all on error
+    with ExitStack() as stack:
+        sql = "SELECT * FROM customer_features_history WHERE version_id > ? ORDER BY version_id"
+        for chunk in _iter_query(con, sql, (last_version,)):
+            last_version = int(chunk["version_id"].max())
+            chunk = chunk.drop(columns=["version_id", "row_hash"]).rename(columns={"updated_at": "event_timestamp"})
+            for date, part in chunk.groupby(chunk["event_timestamp"].str[:10], sort=True):
+                if date not in writers:
+                    path = os.path.join(EXPORT_DIR, f"date={date}", f"part-{run_ts}{ext}")
+                    writers[date] = stack.enter_context(FrameWriter(path))
+                writers[date].write(part.reset_index(drop=True))
+
+    rows = sum(w.rows for w in writers.values())
+    state.update({"last_version_id": last_version, "generation": generation, "last_run": run_ts})
+    _write_state(state)
+    return rows, sorted(writers)
+
 
-    con = sqlite3.connect("transformed_churn.db")
-    df = pd.read_sql_query("SELECT * FROM customer_features", con)
-    df["event_timestamp"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-    df.to_csv("transformed_churn.csv", index=False)
-    con.close()
+def export_full(con):
+    """Rewrite FEAST_FILE with the current features of every customer."""
+    with FrameWriter(FEAST_FILE) as writer:
+        for chunk in _iter_query(con, "SELECT * FROM customer_features"):
+            writer.write(chunk.drop(columns=["row_hash"]).rename(columns={"updated_at": "event_timestamp"}))
+    return writer.rows
+
+
+@instrumented("export")
+def export_to_feast_csv(mode=None):
+    """
+    Export engineered features from SQLite (transformed_churn.db) for the Feast feature store.
+    - incremental (default): only customers changed since the last export are appended to
+      feature_exports/date=YYYY-MM-DD/ partitions
+    - full: the whole table is rewritten to transformed_churn.parquet
+      (CHURN_STORAGE_FORMAT=csv or CHURN_EXPORT_CSV=1 for a CSV file)
+    Rows are streamed from SQLite with a cursor and carry their real event timestamp
+    (the time the customer's features last changed).
+    """
+    import sqlite3
 
-    logging.info("Exported engineered features to transformed_churn.csv")
+    mode = mode or EXPORT_MODE
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    con = sqlite3.connect(TRANSFORMED_DB)
+    try:
+        if mode == "full":
+            rows = export_full(con)
+            logger.info(f"Exported {rows} customers to {FEAST_FILE}")
+        else:
+            rows, dates = export_incremental(con)
+            logger.info(f"Exported {rows} changed customer rows to {EXPORT_DIR} (partitions: {dates})")
+    finally:
+        con.close()
+    record_rows(rows_out=rows)
+    return rows
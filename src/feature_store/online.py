@@ -0,0 +1,165 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.feature_engineering.feature_table import TABLE, HISTORY_TABLE, KEY, PRAGMAS
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+TRANSFORMED_DB = "transformed_churn.db"
+MAX_CACHE_ENTRIES = 100_000
+CACHE_TTL_SECONDS = 300
+SQL_BATCH_KEYS = 500        # keys per IN (...) query, below SQLite's variable limit
+INTERNAL_COLUMNS = ["row_hash"]
+_MISSING = object()         # cached "customer not found"
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, max_entries=MAX_CACHE_ENTRIES, ttl=CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """Return {key: value} for keys cached and not expired."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class OnlineFeatureStore:
+    """
+    Low-latency feature lookups from the indexed SQLite feature table.
+    - get_features: batched multi-key lookups through an LRU + TTL cache
+    - get_historical_features: point-in-time correct values for training rows
+    """
+
+    def __init__(self, db_path=TRANSFORMED_DB, table=TABLE, key=KEY,
+                 max_entries=MAX_CACHE_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+        self.db_path = db_path
+        self.table = table
+        self.history_table = HISTORY_TABLE if table == TABLE else f"{table}_history"
+        self.key = key
+        self.cache = TTLCache(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        for pragma in PRAGMAS:
+            if "journal_mode" not in pragma and "synchronous" not in pragma:  # writer settings
+                self._con.execute(pragma)
+        self._con.execute("PRAGMA query_only=ON")
+        columns = [row[1] for row in self._con.execute(f'PRAGMA table_info("{table}")')]
+        if not columns:
+            raise ValueError(f"Feature table not found: {table} in {db_path}")
+        self.columns = [c for c in columns if c != key and c not in INTERNAL_COLUMNS]
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._con.execute(sql, params).fetchall()
+
+    def _fetch(self, keys):
+        """Latest feature rows for `keys`, straight from SQLite (primary-key lookups)."""
+        quoted = ", ".join(f'"{c}"' for c in self.columns)
+        rows = {}
+        for start in range(0, len(keys), SQL_BATCH_KEYS):
+            batch = keys[start:start + SQL_BATCH_KEYS]
+            placeholders = ", ".join("?" for _ in batch)
+            sql = (f'SELECT "{self.key}", {quoted} FROM "{self.table}" '
+                   f'WHERE "{self.key}" IN ({placeholders})')
+            for row in self._query(sql, batch):
+                rows[row[0]] = row[1:]
+        return rows
+
+    def get_features(self, customer_ids, columns=None):
+        """
+        Features for many customers at once, one row per requested id (in order).
+        Unknown customers get an all-NaN row.
+        """
+        keys = [str(k) for k in customer_ids]
+        unique_keys = list(dict.fromkeys(keys))
+        found = self.cache.get_many(unique_keys)
+        missing = [k for k in unique_keys if k not in found]
+        if missing:
+            fetched = self._fetch(missing)
+            loaded = {k: fetched.get(k, _MISSING) for k in missing}
+            self.cache.put_many(loaded)
+            found.update(loaded)
+
+        empty = (None,) * len(self.columns)
+        values = [empty if found[k] is _MISSING else found[k] for k in keys]
+        df = pd.DataFrame(values, columns=self.columns)
+        df.insert(0, self.key, keys)
+        return df if columns is None else df[[self.key] + list(columns)]
+
+    def get_historical_features(self, entity_df, timestamp_col="event_timestamp", columns=None):
+        """
+        Point-in-time join: for every (customerID, timestamp) row of `entity_df`, the
+        feature values that were current at that time (the latest version written at or
+        before it). Rows with no earlier version get NaN features.
+        """
+        columns = list(columns or self.columns)
+        entities = entity_df.copy()
+        entities[self.key] = entities[self.key].astype(str)
+        entities[timestamp_col] = pd.to_datetime(entities[timestamp_col])
+        keys = list(entities[self.key].unique())
+        max_ts = entities[timestamp_col].max().strftime("%Y-%m-%d %H:%M:%S")
+
+        quoted = ", ".join(f'"{c}"' for c in columns)
+        frames = []
+        for start in range(0, len(keys), SQL_BATCH_KEYS):
+            batch = keys[start:start + SQL_BATCH_KEYS]
+            placeholders = ", ".join("?" for _ in batch)
+            sql = (f'SELECT "{self.key}", updated_at, {quoted} FROM "{self.history_table}" '
+                   f'WHERE "{self.key}" IN ({placeholders}) AND updated_at <= ?')
+            frames.append(pd.DataFrame(self._query(sql, batch + [max_ts]),
+                                       columns=[self.key, "updated_at"] + columns))
+        history = pd.concat(frames, ignore_index=True) if frames else \
+            pd.DataFrame(columns=[self.key, "updated_at"] + columns)
+        history["updated_at"] = pd.to_datetime(history["updated_at"])
+
+        entities["_row"] = range(len(entities))
+        joined = pd.merge_asof(
+            entities.sort_values(timestamp_col),
+            history.sort_values("updated_at"),
+            left_on=timestamp_col, right_on="updated_at", by=self.key, direction="backward",
+        )
+        joined = joined.sort_values("_row").drop(columns="_row")
+        joined.index = entity_df.index
+        return joined
+
+    def close(self):
+        self._con.close()
@@ -0,0 +1,264 @@
+"""
+Concurrent, resumable ingestion of many configured sources.
+
+Sources are fetched at the same time over one pooled aiohttp session. Each HTTP
+body is streamed to disk (resuming partial downloads with Range requests and
+retrying with exponential backoff), then parsed incrementally into chunks that are
+written to raw_data/ through the storage layer, so no source is ever held in memory
+as a whole. Sources come from SOURCES or a JSON file named by CHURN_INGEST_SOURCES
+(see src/ingestion/sources.py):
+
+    [{"name": "api", "url": "https://...", "format": "json"},
+     {"name": "eu", "url": "http://localhost:8001/eu.ndjson", "format": "ndjson",
+      "schema": {"customerID": "text", "tenure": "numeric", "TotalCharges": "text", ...}},
+     {"name": "csv", "path": "Telco-Customer-Churn.csv", "format": "csv"}]
+
+The columns and types of a raw file are the source's declared "schema" ("numeric" or
+"text" per column), or else those of its first parsed chunk. A later chunk with a field
+outside that schema, or with text in a numeric column, fails the source with an error
+naming the columns (declare them in "schema") instead of being dropped or set to NaN.
+"""
+import os
+import re
+import json
+import random
+import asyncio
+from datetime import datetime
+
+import aiohttp
+import pandas as pd
+
+from src.ingestion.ingest import RAW_DIR, raw_files, _align_chunk
+from src.ingestion.sources import load_sources
+from src.storage.intermediate import data_path, iter_frames, FrameWriter
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import track_stage, instrumented, record_rows, record_files
+
+logger = get_logger(__name__)
+
+DOWNLOAD_DIR = os.path.join(RAW_DIR, "downloads")
+
+MAX_CONNECTIONS = 16          # pooled connections across all sources
+MAX_CONNECTIONS_PER_HOST = 4
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0         # doubled after each failed attempt (plus jitter)
+READ_TIMEOUT = 60             # seconds without data before an attempt fails
+DOWNLOAD_BLOCK = 256 * 1024
+PARSE_BLOCK = 1024 * 1024
+CHUNK_ROWS = 50_000           # records per parsed chunk
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_SEPARATORS = re.compile(r"[\s,]*")           # between the elements of a JSON array
+_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*\Z")   # a number cut at the end of a block
+
+
+class RetryableError(Exception):
+    pass
+
+
+# ---------------- Download ---------------- #
+
+async def _download_once(session, url, part_path, meta_path):
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    meta = {}
+    if offset and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+    headers = {}
+    validator = meta.get("etag") or meta.get("last_modified")
+    if offset and validator:
+        # Resume only if the remote file is still the one we started downloading
+        headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+
+    async with session.get(url, headers=headers) as resp:
+        if resp.status in RETRY_STATUS:
+            raise RetryableError(f"HTTP {resp.status} from {url}")
+        if resp.status == 416:  # nothing left to fetch
+            return
+        resp.raise_for_status()
+
+        mode = "ab" if resp.status == 206 else "wb"
+        if mode == "wb":
+            offset = 0
+            with open(meta_path, "w") as f:
+                json.dump({"url": url, "etag": resp.headers.get("ETag"),
+                           "last_modified": resp.headers.get("Last-Modified")}, f)
+        with open(part_path, mode) as f:
+            async for block in resp.content.iter_chunked(DOWNLOAD_BLOCK):
+                f.write(block)
+
+
+async def download(session, source, dest_path):
+    """
+    Stream a source body to `dest_path`, retrying with backoff and resuming
+    partial downloads (kept as <download_dir>/<name>.part between attempts and runs).
+    """
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    part_path = os.path.join(DOWNLOAD_DIR, f"{source['name']}.part")
+    meta_path = f"{part_path}.json"
+
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            await _download_once(session, source["url"], part_path, meta_path)
+            break
+        except (aiohttp.ClientError, asyncio.TimeoutError, RetryableError) as e:
+            if attempt == MAX_RETRIES:
+                logger.error(f"Giving up on {source['name']} after {attempt + 1} attempts: {str(e)}")
+                raise
+            delay = BACKOFF_SECONDS * 2 ** attempt * (1 + random.random() / 2)
+            logger.warning(f"Download of {source['name']} failed ({str(e)}), retry in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    os.replace(part_path, dest_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    return dest_path
+
+
+# ---------------- Streaming parse ---------------- #
+
+def _iter_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _iter_json_array(path):
+    """
+    Yield the elements of a top-level JSON array without loading the whole document.
+    Elements are decoded in place at an offset into the buffer; the consumed prefix is
+    dropped only when the next block is read.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer, more = "", True
+        while more and not buffer:   # skip leading whitespace, however long
+            more = f.read(PARSE_BLOCK)
+            buffer = more.lstrip()
+        if not buffer.startswith("["):
+            # Not an array (e.g. {column: {row: value}}): fall back to a full load
+            buffer += f.read()
+            yield from pd.DataFrame(json.loads(buffer)).to_dict(orient="records")
+            return
+        pos, eof = 1, False
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Unterminated array", buffer, pos)
+                record, end = decoder.raw_decode(buffer, pos)
+                # numbers are the only values that may continue in the next block
+                if (not eof and isinstance(record, (int, float)) and not isinstance(record, bool)
+                        and _NUMBER_TAIL.match(buffer, end)):
+                    raise json.JSONDecodeError("Incomplete number", buffer, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(PARSE_BLOCK)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield record
+            pos = end
+
+
+def iter_record_chunks(path, fmt, chunk_rows=None):
+    """Parse a downloaded/local source file into DataFrame chunks of `chunk_rows` (default CHUNK_ROWS)."""
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    if fmt == "csv":
+        yield from iter_frames(path, chunksize=chunk_rows)
+        return
+    records = _iter_ndjson(path) if fmt == "ndjson" else _iter_json_array(path)
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            yield pd.DataFrame.from_records(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch)
+
+
+def _infer_schema(chunk):
+    return {str(c).strip(): "numeric" if pd.api.types.is_numeric_dtype(chunk[c]) else "text"
+            for c in chunk.columns}
+
+
+def _check_chunk(chunk, schema, name):
+    """Align a parsed chunk to the file schema; raise ValueError if that would lose values."""
+    extra = [c for c in (str(c).strip() for c in chunk.columns) if c not in schema]
+    if extra:
+        raise ValueError(f"Source {name}: fields {extra} are not in the schema of the file "
+                         f"(columns {list(schema)}); add them to the source's \"schema\"")
+    coerced = {}
+    aligned = _align_chunk(chunk, schema, coerced)
+    if coerced:
+        raise ValueError(f"Source {name}: non-numeric values in numeric columns {coerced}; "
+                         f"declare these columns as \"text\" in the source's \"schema\"")
+    return aligned
+
+
+def write_raw(source, path):
+    """
+    Parse one source file chunk by chunk into a raw data file; returns its path.
+    Every chunk is aligned to the declared (or first chunk's) schema, see the module docstring.
+    """
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    raw_path = data_path(f"{RAW_DIR}/raw_churn_{source['name']}_{ts}")
+    schema = source.get("schema")
+    with track_stage(f"ingest.parse.{source['name']}"), FrameWriter(raw_path) as writer:
+        for chunk in iter_record_chunks(path, source.get("format", "json")):
+            if schema is None:
+                schema = _infer_schema(chunk)
+            writer.write(_check_chunk(chunk, schema, source["name"]))
+            record_rows(rows_in=len(chunk), rows_out=len(chunk))
+        record_files(read=[path])
+    logger.info(f"{source['name']} ingested successfully: {raw_path} ({writer.rows} rows)")
+    return raw_path
+
+
+# ---------------- Orchestration ---------------- #
+
+async def ingest_source(session, source):
+    """Download (if remote) and parse one source; parsing runs in a worker thread."""
+    if "url" in source:
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ext = {"ndjson": ".ndjson", "csv": ".csv"}.get(source.get("format"), ".json")
+        body_path = await download(session, source, os.path.join(DOWNLOAD_DIR, f"{source['name']}_{ts}{ext}"))
+    else:
+        body_path = source["path"]
+    raw_path = await asyncio.to_thread(write_raw, source, body_path)
+    if "url" in source:
+        os.remove(body_path)
+    return raw_path
+
+
+async def ingest_sources_async(sources):
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS_PER_HOST)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        return await asyncio.gather(*(ingest_source(session, s) for s in sources))
+
+
+@instrumented("ingest.sources")
+def ingest_sources(sources=None, names=None):
+    """
+    Ingest all configured sources concurrently (or only those in `names`).
+    The raw files are registered in ingest.raw_files for merge_all().
+    """
+    sources = sources or load_sources()
+    if names:
+        sources = [s for s in sources if s["name"] in names]
+    os.makedirs(RAW_DIR, exist_ok=True)
+    paths = asyncio.run(ingest_sources_async(sources))
+    raw_files.extend(paths)
+    return paths
+
+
+if __name__ == "__main__":
+    print(ingest_sources())
@@ -1,61 +1,159 @@
-import os
-import logging
 from datetime import datetime
 import pandas as pd
 import requests
 
-# Logging configuration
-logging.basicConfig(filename="ingestion.log", level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+from src.storage.intermediate import (
+    data_path, read_frame, write_frame, iter_frames, FrameWriter
+)
+from src.monitoring.profile import DatasetProfile
+from src.monitoring.drift import MONITORING, record_batch
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_rows, record_files
 
+logger = get_logger(__name__)
+
+SOURCE_CSV = "Telco-Customer-Churn.csv"  # adjust path if needed
 RAW_DIR = "raw_data"
-MERGED_FILE = "data/processed/merged_churn.csv"
-os.makedirs(RAW_DIR, exist_ok=True)
-os.makedirs(os.path.dirname(MERGED_FILE), exist_ok=True)
+MERGED_FILE = data_path("data/processed/merged_churn")
+CHUNK_SIZE = 100_000         # rows per chunk in streaming merge
+SCHEMA_SAMPLE_ROWS = 1_000   # rows per source used to infer column types
 
 # Store raw file paths dynamically
 raw_files = []
 
-def ingest_csv():
-    df = pd.read_csv("Telco-Customer-Churn.csv")  # adjust path if needed
+@instrumented("ingest.csv")
+def ingest_csv(source_path=SOURCE_CSV):
+    df = pd.read_csv(source_path)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    raw_path = f"{RAW_DIR}/raw_churn_csv_{ts}.csv"
-    df.to_csv(raw_path, index=False)
+    raw_path = data_path(f"{RAW_DIR}/raw_churn_csv_{ts}")
+    write_frame(df, raw_path)
     raw_files.append(raw_path)
-    logging.info(f"CSV ingested successfully: {raw_path}")
+    record_rows(rows_out=len(df))
+    logger.info(f"CSV ingested successfully: {raw_path}")
     return df
 
+@instrumented("ingest.api")
 def ingest_api():
     url = "https://raw.githubusercontent.com/AnalyticsKnight/youtube/master/data/telecom_churn.json"
     resp = requests.get(url, timeout=30)
     resp.raise_for_status()
     df = pd.DataFrame(resp.json())
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    raw_path = f"{RAW_DIR}/raw_churn_api_{ts}.csv"
-    df.to_csv(raw_path, index=False)
+    raw_path = data_path(f"{RAW_DIR}/raw_churn_api_{ts}")
+    write_frame(df, raw_path)
     raw_files.append(raw_path)
-    logging.info(f"API ingested successfully: {raw_path}")
+    record_rows(rows_out=len(df))
+    logger.info(f"API ingested successfully: {raw_path}")
     return df
 
-def merge_all():
-    """Merge all ingested DataFrames into one CSV"""
-    merged_df = pd.DataFrame()
-    for file_path in raw_files:
-        df = pd.read_csv(file_path)
-        merged_df = pd.concat([merged_df, df], ignore_index=True)
-    merged_df.to_csv(MERGED_FILE, index=False)
-    logging.info(f"Merged CSV saved at: {MERGED_FILE}")
+@instrumented("ingest.merge")
+def merge_all(streaming=False, chunksize=CHUNK_SIZE, paths=None):
+    """
+    Merge all ingested raw files into one file (MERGED_FILE).
+    - streaming=False: read every file fully, then concatenate them in one pd.concat
+    - streaming=True: read each file in `chunksize` row chunks, align it to the
+      reconciled schema and append it to MERGED_FILE (memory bounded by chunk size)
+    - paths: raw files to merge (default: raw_files, those ingested in this process)
+    """
+    paths = raw_files if paths is None else paths
+    if streaming:
+        return merge_all_streaming(chunksize=chunksize, paths=paths)
+
+    frames = [read_frame(file_path) for file_path in paths]
+    merged_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    write_frame(merged_df, MERGED_FILE)
+    if MONITORING:
+        record_batch(DatasetProfile().update(merged_df))
+    record_rows(rows_in=len(merged_df), rows_out=len(merged_df))
+    record_files(read=paths, written=[MERGED_FILE])
+    logger.info(f"Merged data saved at: {MERGED_FILE}")
+    return MERGED_FILE
+
+
+def reconcile_schema(file_paths, sample_rows=SCHEMA_SAMPLE_ROWS):
+    """
+    Build one column schema across all raw sources.
+    Columns are kept in first-seen order. A column is numeric only if every
+    source that has it parses it as numeric in its first `sample_rows` rows,
+    otherwise it is kept as text. Columns missing from a source are filled with NaN.
+    """
+    schema = {}
+    for file_path in file_paths:
+        sample = next(iter_frames(file_path, chunksize=sample_rows), pd.DataFrame())
+        sample.columns = [str(c).strip() for c in sample.columns]
+        for col in sample.columns:
+            kind = "numeric" if pd.api.types.is_numeric_dtype(sample[col]) else "text"
+            if schema.get(col, kind) == "text":
+                kind = "text"
+            schema[col] = kind
+    return schema
+
+
+def _align_chunk(chunk, schema, coerced=None):
+    """
+    Rename, reorder and cast one chunk to the reconciled schema.
+    Numeric columns become float64 and text columns the pandas string dtype,
+    so every chunk has identical dtypes (required by the columnar writers).
+    Values of a numeric column that do not parse as numbers become NaN; their
+    count per column is added to `coerced` (a dict) when given.
+    """
+    chunk.columns = [str(c).strip() for c in chunk.columns]
+    chunk = chunk.reindex(columns=list(schema))
+    for col, kind in schema.items():
+        if kind == "numeric":
+            values = pd.to_numeric(chunk[col], errors="coerce").astype("float64")
+            if coerced is not None:
+                lost = int((values.isna() & chunk[col].notna()).sum())
+                if lost:
+                    coerced[col] = coerced.get(col, 0) + lost
+            chunk[col] = values
+        else:
+            chunk[col] = chunk[col].astype("string")
+    return chunk
+
+
+def merge_all_streaming(chunksize=CHUNK_SIZE, paths=None):
+    """
+    Stream every raw file into MERGED_FILE chunk by chunk.
+    Nothing is concatenated in memory: each aligned chunk is appended to
+    MERGED_FILE as soon as it is read, and folded into the batch's drift profile
+    (src/monitoring, disabled with CHURN_MONITORING=0).
+    Column types come from a sample of each source (reconcile_schema), so later
+    non-numeric values in a numeric column are set to NaN; they are counted and
+    logged per column and file.
+    """
+    paths = raw_files if paths is None else paths
+    schema = reconcile_schema(paths)
+    profile = DatasetProfile() if MONITORING else None
+    with FrameWriter(MERGED_FILE, columns=list(schema)) as writer:
+        for file_path in paths:
+            coerced = {}
+            for chunk in iter_frames(file_path, chunksize=chunksize):
+                chunk = _align_chunk(chunk, schema, coerced)
+                writer.write(chunk)
+                if profile is not None:
+                    profile.update(chunk)
+            for col, count in coerced.items():
+                logger.warning(f"{file_path}: {count} non-numeric values in numeric column '{col}' set to NaN "
+                               f"(type inferred from the first {SCHEMA_SAMPLE_ROWS} rows)")
+    if profile is not None:
+        record_batch(profile)
+    record_rows(rows_in=writer.rows, rows_out=writer.rows)
+    record_files(read=paths, written=[MERGED_FILE])
+    logger.info(f"Streamed {writer.rows} rows from {len(paths)} files into: {MERGED_FILE}")
     return MERGED_FILE
 
 def run_dvc_versioning():
-    """Automatically run DVC versioning after ingestion"""
-    import subprocess
-    versioning_script = os.path.join("src", "versioning", "dvc_versioning.py")
-    if os.path.exists(versioning_script):
-        subprocess.run(f"python {versioning_script}", shell=True, check=True)
-        logging.info("DVC versioning executed successfully.")
-    else:
-        logging.warning(f"DVC versioning script not found: {versioning_script}")
+    """Version the raw + merged data with DVC, in this process (only new/changed files)."""
+    from src.versioning.dvc_versioning import track_dvc
+    return track_dvc()
+
+def merge_raw_files(paths=None):
+    """
+    Stream-merge raw files into MERGED_FILE (pipeline "merge" stage).
+    `paths` are the files returned by the ingest tasks; default: raw_files.
+    """
+    return merge_all(streaming=True, paths=paths)
 
 if __name__ == "__main__":
     # Step 1: Ingest CSV + API
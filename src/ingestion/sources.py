@@ -0,0 +1,29 @@
+"""
+Ingestion source configuration.
+
+Kept free of heavy imports: the Airflow DAG reads it at parse time to create one
+ingest task per source. Sources come from SOURCES or a JSON file named by
+CHURN_INGEST_SOURCES (format described in src/ingestion/async_ingest.py).
+"""
+import os
+import json
+
+SOURCES = [
+    {"name": "csv", "path": "Telco-Customer-Churn.csv", "format": "csv"},
+    {"name": "api", "format": "json",
+     "url": "https://raw.githubusercontent.com/AnalyticsKnight/youtube/master/data/telecom_churn.json"},
+]
+SOURCES_FILE = os.environ.get("CHURN_INGEST_SOURCES")
+
+
+def load_sources(path=SOURCES_FILE):
+    """Configured sources: the JSON file named by CHURN_INGEST_SOURCES, else SOURCES."""
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return SOURCES
+
+
+def source_names(path=SOURCES_FILE):
+    """Names of the configured sources, in configuration order."""
+    return [source["name"] for source in load_sources(path)]
@@ -0,0 +1,40 @@
+import sys
+import logging
+
+# Log file per package; the most specific prefix wins, everything else under src -> ingestion.log
+LOG_FILES = {
+    "src": "ingestion.log",
+    "src.modeling": "modeling.log",
+    "src.scoring": "scoring.log",
+}
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+_configured = False
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Attach one file handler per entry of LOG_FILES (idempotent).
+    Replaces the per-module logging.basicConfig calls, of which only the first ever took effect.
+    """
+    global _configured
+    if _configured:
+        return
+    formatter = logging.Formatter(LOG_FORMAT)
+    for name, filename in LOG_FILES.items():
+        logger = logging.getLogger(name)
+        handler = logging.FileHandler(filename, delay=True)  # file is opened on first record
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = name == "src"   # sub-package files do not also go to ingestion.log
+    _configured = True
+
+
+def get_logger(name):
+    """Module logger, e.g. `logger = get_logger(__name__)`; works for `python -m` runs too."""
+    if name == "__main__":
+        spec = getattr(sys.modules["__main__"], "__spec__", None)
+        name = spec.name if spec is not None else "src"
+    configure_logging()
+    return logging.getLogger(name)
@@ -0,0 +1,271 @@
+"""
+Stage-level performance instrumentation.
+
+Every instrumented stage records wall time, CPU time, peak RSS, rows in/out and
+bytes read/written. Records are appended to reports/metrics/stage_metrics.jsonl and
+the latest value per stage is exposed in Prometheus text format
+(reports/metrics/stage_metrics.prom, e.g. for the node_exporter textfile collector).
+Both files are updated under an exclusive file lock, so concurrent stages (parallel
+Airflow tasks, train.fit.* in loky workers) never lose each other's records.
+
+- cpu_seconds: CPU time of this process. children_cpu_seconds adds child processes
+  that exited and were waited for during the stage (e.g. subprocess.run); workers of
+  a persistent pool (joblib/loky) are not included: stages they run (train.fit.*,
+  train.cv.*) record their own CPU time.
+- peak_rss_bytes: highest RSS of this process during the stage, sampled every
+  RSS_SAMPLE_SECONDS (Linux /proc); process_peak_rss_bytes is the peak over the
+  whole process lifetime (ru_maxrss), which includes earlier stages.
+With CHURN_PROFILE=1 each stage is also run under cProfile and its .pstats file is
+written to reports/metrics/profiles/ (view with `snakeviz` or `flameprof`; for
+sampling flame graphs of a whole run use `py-spy record -o flame.svg -- python -m ...`).
+
+    @instrumented("validate")
+    def validate(): ...
+        record_rows(rows_in=len(df))
+
+    with track_stage("train.fit.XGBoost"):
+        model.fit(X, y)
+"""
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+METRICS_DIR = os.path.join("reports", "metrics")
+METRICS_FILE = os.path.join(METRICS_DIR, "stage_metrics.jsonl")
+LATEST_FILE = os.path.join(METRICS_DIR, "stage_metrics_latest.json")
+PROMETHEUS_FILE = os.path.join(METRICS_DIR, "stage_metrics.prom")
+PROFILE_DIR = os.path.join(METRICS_DIR, "profiles")
+LOCK_FILE = os.path.join(METRICS_DIR, ".lock")
+PROFILE = os.environ.get("CHURN_PROFILE", "0") == "1"
+RSS_SAMPLE_SECONDS = 0.05
+
+PROMETHEUS_GAUGES = {
+    "wall_seconds": "Wall-clock time of the last run of a pipeline stage",
+    "cpu_seconds": "CPU time (user + system) of the process running the stage",
+    "children_cpu_seconds": "CPU time of child processes that exited during the stage",
+    "peak_rss_bytes": "Peak resident memory of the process during the stage (sampled)",
+    "process_peak_rss_bytes": "Peak resident memory of the process over its lifetime",
+    "rows_in": "Rows read by the stage",
+    "rows_out": "Rows written by the stage",
+    "bytes_read": "Bytes read by the stage",
+    "bytes_written": "Bytes written by the stage",
+}
+
+_current = contextvars.ContextVar("current_stage", default=None)
+
+
+def _process_peak_rss_bytes():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024  # KB on Linux
+    except (ImportError, AttributeError):
+        return None
+
+
+def _children_cpu_seconds():
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+    except ImportError:
+        return None
+
+
+def _rss_bytes():
+    """Current resident memory of this process (Linux /proc), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RssSampler:
+    """Background thread tracking the highest RSS seen until stop()."""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.peak = _rss_bytes()
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            self.peak = max(self.peak, _rss_bytes() or 0)
+
+    def stop(self):
+        if self._thread is None:
+            return None
+        self._stopped.set()
+        self._thread.join()
+        return max(self.peak, _rss_bytes() or 0)
+
+
+def _io_counters():
+    """Bytes read/written by this process so far (Linux /proc), or None."""
+    try:
+        with open(f"/proc/{os.getpid()}/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def record_rows(rows_in=None, rows_out=None):
+    """Add row counts to the stage currently being tracked (no-op outside a stage)."""
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if rows_in is not None:
+        metrics["rows_in"] = (metrics["rows_in"] or 0) + int(rows_in)
+    if rows_out is not None:
+        metrics["rows_out"] = (metrics["rows_out"] or 0) + int(rows_out)
+
+
+def record_files(read=(), written=()):
+    """Count the size of files read/written when OS-level I/O counters are not available."""
+    metrics = _current.get()
+    if metrics is None or metrics.get("_os_io"):
+        return
+    for key, paths in (("bytes_read", read), ("bytes_written", written)):
+        for path in paths:
+            if path and os.path.isfile(path):
+                metrics[key] = (metrics[key] or 0) + os.path.getsize(path)
+
+
+def _write_prometheus(latest):
+    lines = []
+    for field, help_text in PROMETHEUS_GAUGES.items():
+        metric = f"churn_stage_{field}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for stage, record in sorted(latest.items()):
+            if record.get(field) is not None:
+                lines.append(f'{metric}{{stage="{stage}",status="{record["status"]}"}} {record[field]}')
+    tmp_path = f"{PROMETHEUS_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, PROMETHEUS_FILE)
+
+
+@contextmanager
+def _locked(path=LOCK_FILE):
+    """Exclusive lock across processes (fcntl.flock; no locking where fcntl is unavailable)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def emit(metrics):
+    """Append one stage record to the JSONL file and refresh the latest/Prometheus files."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with _locked():
+        with open(METRICS_FILE, "a") as f:
+            f.write(json.dumps(metrics) + "\n")
+
+        try:
+            with open(LATEST_FILE) as f:
+                latest = json.load(f)
+        except (OSError, ValueError):
+            latest = {}
+        latest[metrics["stage"]] = metrics
+        tmp_path = f"{LATEST_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(latest, f)
+        os.replace(tmp_path, LATEST_FILE)
+        _write_prometheus(latest)
+
+
+@contextmanager
+def track_stage(name, profile=None):
+    """Measure the enclosed block as stage `name` and emit its metrics when it ends."""
+    profile = PROFILE if profile is None else profile
+    metrics = {
+        "stage": name,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "status": "ok",
+        "wall_seconds": None, "cpu_seconds": None, "children_cpu_seconds": None,
+        "peak_rss_bytes": None, "process_peak_rss_bytes": None,
+        "rows_in": None, "rows_out": None, "bytes_read": None, "bytes_written": None,
+        "profile": None,
+    }
+    io_start = _io_counters()
+    metrics["_os_io"] = io_start is not None
+    token = _current.set(metrics)
+
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    sampler = _RssSampler()
+    children_start = _children_cpu_seconds()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield metrics
+    except BaseException:
+        metrics["status"] = "error"
+        raise
+    finally:
+        metrics["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+        metrics["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+        children_end = _children_cpu_seconds()
+        if children_start is not None and children_end is not None:
+            metrics["children_cpu_seconds"] = round(children_end - children_start, 6)
+        metrics["peak_rss_bytes"] = sampler.stop()
+        metrics["process_peak_rss_bytes"] = _process_peak_rss_bytes()
+        io_end = _io_counters()
+        if io_start is not None and io_end is not None:
+            metrics["bytes_read"] = io_end[0] - io_start[0]
+            metrics["bytes_written"] = io_end[1] - io_start[1]
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(PROFILE_DIR, f"{name}_{ts}_{os.getpid()}.pstats")
+            profiler.dump_stats(path)
+            metrics["profile"] = path
+        _current.reset(token)
+        del metrics["_os_io"]
+        try:
+            emit(metrics)
+        except OSError as e:  # metrics must never break the pipeline
+            logger.warning(f"Could not write stage metrics for {name}: {str(e)}")
+        logger.info(
+            f"Stage {name} {metrics['status']}: wall={metrics['wall_seconds']:.3f}s "
+            f"cpu={metrics['cpu_seconds']:.3f}s rows_in={metrics['rows_in']} rows_out={metrics['rows_out']}"
+        )
+
+
+def instrumented(name):
+    """Decorator form of track_stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,253 @@
+# src/modeling/artifacts.py
+"""
+Compact, fast-loading model artifacts.
+
+The best model is saved as a bundle directory with the fitted preprocessor and a
+manifest.json describing the model format:
+
+- xgboost:     native XGBoost model file (.ubj binary or .json), no pickle
+- tree_arrays: sklearn tree ensembles (RandomForest, ExtraTrees, DecisionTree,
+               GradientBoosting) flattened into float32/int32 .npy node arrays that
+               are memory-mapped at load time and predicted for all trees at once
+- joblib:      any other model (pickled)
+
+CHURN_MODEL_FORMAT=joblib pickles every model instead (the previous behaviour).
+Loading a bundle only imports what its format needs (xgboost for xgboost bundles,
+sklearn only for joblib bundles and the preprocessor).
+"""
+import os
+import json
+import shutil
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLE_DIR = os.path.join("models", "bundles")
+PREPROCESSOR_FILE = "models/preprocessor.joblib"   # src.preprocessing.preprocess (not imported: sklearn)
+MANIFEST_FILE = "manifest.json"
+LATEST_MODEL_FILE = os.path.join("models", "latest_model.json")   # run manifest of the last training
+# native: XGBoost / tree-array formats where available | joblib: pickle every model
+MODEL_FORMAT = os.environ.get("CHURN_MODEL_FORMAT", "native")
+XGBOOST_FORMAT = os.environ.get("CHURN_XGBOOST_FORMAT", "ubj")   # ubj | json
+TREE_ARRAYS = ["feature", "threshold", "left", "right", "missing_left", "value", "roots"]
+PREDICT_BLOCK = 8_192   # rows traversed at a time (bounds the rows x trees node matrix)
+
+
+# ---------------- Tree ensembles as arrays ---------------- #
+
+def _float32_floor(threshold):
+    """float32 thresholds with x <= t32 exactly when x <= t for float32 x (as sklearn compares)."""
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def flatten_trees(model):
+    """
+    Node arrays of a fitted sklearn tree model (all trees concatenated, child indices global).
+    Returns (arrays, params) or None if the model is not a supported binary tree model.
+    """
+    name = type(model).__name__
+    if name in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        trees, kind = [e.tree_ for e in model.estimators_], "average"
+    elif name == "DecisionTreeClassifier":
+        trees, kind = [model.tree_], "average"
+    elif name == "GradientBoostingClassifier" and model.estimators_.shape[1] == 1:
+        trees, kind = [e.tree_ for e in model.estimators_[:, 0]], "boosting"
+    else:
+        return None
+
+    params = {"kind": kind, "learning_rate": 1.0, "base_score": 0.0}
+    if kind == "boosting":
+        if model.init_ == "zero":
+            base = 0.0
+        elif hasattr(model.init_, "class_prior_"):
+            p = float(model.init_.class_prior_[1])
+            base = float(np.log(p / (1 - p)))
+        else:
+            return None
+        params.update(learning_rate=float(model.learning_rate), base_score=base)
+
+    parts = {key: [] for key in TREE_ARRAYS}
+    offset = 0
+    for tree in trees:
+        n = tree.node_count
+        own = np.arange(offset, offset + n, dtype=np.int32)
+        leaf = tree.children_left == -1
+        parts["feature"].append(np.where(leaf, -1, tree.feature).astype(np.int32))
+        parts["threshold"].append(_float32_floor(tree.threshold))
+        parts["left"].append(np.where(leaf, own, tree.children_left + offset).astype(np.int32))
+        parts["right"].append(np.where(leaf, own, tree.children_right + offset).astype(np.int32))
+        missing = getattr(tree, "missing_go_to_left", np.zeros(n, dtype=np.uint8))
+        parts["missing_left"].append(np.asarray(missing, dtype=np.uint8))
+        values = tree.value[:, 0, :]
+        if kind == "average":   # probability of class 1 in the leaf
+            totals = values.sum(axis=1)
+            leaf_value = np.divide(values[:, 1], totals, out=np.zeros(n), where=totals > 0)
+        else:                   # regression tree output (log-odds contribution)
+            leaf_value = values[:, 0]
+        parts["value"].append(leaf_value.astype(np.float32))
+        parts["roots"].append(np.array([offset], dtype=np.int32))
+        offset += n
+
+    arrays = {key: np.concatenate(chunks) for key, chunks in parts.items()}
+    params["max_depth"] = int(max(tree.max_depth for tree in trees))
+    params["n_trees"] = len(trees)
+    return arrays, params
+
+
+class TreeEnsembleModel:
+    """Vectorized predict/predict_proba over flattened (optionally memory-mapped) tree arrays."""
+
+    def __init__(self, arrays, kind, max_depth, learning_rate=1.0, base_score=0.0, **_):
+        for key in TREE_ARRAYS:
+            setattr(self, key, arrays[key])
+        self.kind = kind
+        self.max_depth = max_depth
+        self.learning_rate = learning_rate
+        self.base_score = base_score
+
+    def _leaf_values(self, X):
+        """(rows, trees) leaf outputs: every tree advances one level per iteration."""
+        nodes = np.broadcast_to(np.asarray(self.roots), (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            if (feature < 0).all():
+                break
+            x = X[rows, np.maximum(feature, 0)]
+            go_left = (x <= self.threshold[nodes]) | (np.isnan(x) & (self.missing_left[nodes] == 1))
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])   # leaves point to themselves
+        return self.value[nodes]
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        p = np.empty(len(X))
+        for start in range(0, len(X), PREDICT_BLOCK):
+            values = self._leaf_values(X[start:start + PREDICT_BLOCK])
+            if self.kind == "average":
+                p[start:start + PREDICT_BLOCK] = values.mean(axis=1, dtype=np.float64)
+            else:
+                raw = self.base_score + self.learning_rate * values.sum(axis=1, dtype=np.float64)
+                p[start:start + PREDICT_BLOCK] = 1 / (1 + np.exp(-raw))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        # strictly above 0.5, like sklearn (argmax, ties -> class 0) and XGBClassifier.predict
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+# ---------------- XGBoost native format ---------------- #
+
+class NativeBoosterModel:
+    """predict/predict_proba over an XGBoost Booster loaded from its native model file."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict_proba(self, X):
+        p = self.booster.inplace_predict(np.asarray(X, dtype=np.float32), validate_features=False)
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)   # as XGBClassifier.predict
+
+
+def _booster_of(model):
+    """The Booster of an XGBClassifier or of streaming.BoosterClassifier (else None)."""
+    if type(model).__name__ == "XGBClassifier":
+        return model.get_booster()
+    booster = getattr(model, "booster", None)
+    return booster if type(booster).__name__ == "Booster" else None
+
+
+# ---------------- Bundles ---------------- #
+
+def save_bundle(model, name, metrics=None, feature_names=None, preprocessor_path=PREPROCESSOR_FILE,
+                bundle_dir=BUNDLE_DIR, model_format=None):
+    """
+    Write `model` + the fitted preprocessor + manifest.json to bundle_dir/<name>_<timestamp>/.
+    The timestamp has microseconds, so bundles saved within the same second do not collide.
+    Returns the bundle directory.
+    """
+    model_format = model_format or MODEL_FORMAT
+    now = datetime.now()
+    ts = now.strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(bundle_dir, f"{name}_{now.strftime('%Y%m%d_%H%M%S_%f')}")
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    manifest = {
+        "model_name": name,
+        "model_class": type(model).__name__,
+        "created_at": ts,
+        "feature_names": list(feature_names) if feature_names is not None else None,
+        "metrics": {k: float(v) for k, v in (metrics or {}).items()},
+        "files": {},
+    }
+    booster = _booster_of(model) if model_format == "native" else None
+    trees = flatten_trees(model) if model_format == "native" and booster is None else None
+    if booster is not None:
+        model_file = f"model.{XGBOOST_FORMAT}"
+        booster.save_model(os.path.join(tmp_path, model_file))
+        manifest.update(format="xgboost", files={"model": model_file})
+    elif trees is not None:
+        arrays, params = trees
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"tree_{key}.npy"), array)
+        manifest.update(format="tree_arrays", tree=params,
+                        files={key: f"tree_{key}.npy" for key in arrays})
+    else:
+        joblib.dump(model, os.path.join(tmp_path, "model.joblib"))
+        manifest.update(format="joblib", files={"model": "model.joblib"})
+
+    if preprocessor_path and os.path.exists(preprocessor_path):
+        shutil.copyfile(preprocessor_path, os.path.join(tmp_path, "preprocessor.joblib"))
+        manifest["preprocessor"] = "preprocessor.joblib"
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    logger.info(f"Saved {manifest['format']} model bundle {path} ({size / 1024:.1f} KiB)")
+    return path
+
+
+def load_model(path, manifest=None):
+    """The model of a bundle directory (tree arrays are memory-mapped, not read)."""
+    if manifest is None:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+    fmt = manifest["format"]
+    if fmt == "xgboost":
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(path, manifest["files"]["model"]))
+        return NativeBoosterModel(booster)
+    if fmt == "tree_arrays":
+        arrays = {key: np.load(os.path.join(path, file), mmap_mode="r")
+                  for key, file in manifest["files"].items()}
+        return TreeEnsembleModel(arrays, **manifest["tree"])
+    return joblib.load(os.path.join(path, manifest["files"]["model"]))
+
+
+def load_bundle(path):
+    """(model, preprocessor or None, manifest) of a bundle directory."""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    preprocessor = None
+    if manifest.get("preprocessor"):
+        from src.preprocessing.preprocess import ChurnPreprocessor
+        preprocessor = ChurnPreprocessor.load(os.path.join(path, manifest["preprocessor"]))
+    return load_model(path, manifest), preprocessor, manifest
+
+
+def is_bundle(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE))
@@ -0,0 +1,186 @@
+# src/modeling/reporting.py
+
+import os
+import sys
+import argparse
+import subprocess
+
+import numpy as np
+from sklearn.metrics import classification_report, roc_curve, auc
+
+from src.instrumentation.logs import LOG_FILES, get_logger
+from src.instrumentation.stage_metrics import track_stage, record_files
+
+logger = get_logger(__name__)
+
+PLOTS_DIR = os.path.join("reports", "plots")
+# Raw evaluation data of the last training run (confusion matrices + ROC points per model)
+CURVES_FILE = os.path.join(PLOTS_DIR, "curves.npz")
+# sync: render in the training process | background: detached renderer process
+# deferred: only store curve data (render later with `python -m src.modeling.reporting`)
+PLOT_MODE = os.environ.get("CHURN_PLOT_MODE", "sync")
+PLOT_MODES = ("sync", "background", "deferred")
+CLASS_LABELS = ["No Churn", "Churn"]
+
+
+def binary_metrics(y_true, y_pred, y_proba):
+    """
+    Accuracy/Precision/Recall/F1/AUC for 0/1 labels from a single confusion-matrix pass.
+    Returns (metrics, curves) where curves holds the compact data needed to plot later:
+    - confusion_matrix: 2x2 int64 [[tn, fp], [fn, tp]]
+    - fpr / tpr: float32 ROC points (collinear points dropped)
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_pred = np.asarray(y_pred).astype(np.int64)
+    cm = np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+    (tn, fp), (fn, tp) = cm
+
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    fpr, tpr, _ = roc_curve(y_true, y_proba, drop_intermediate=True)
+
+    metrics = {
+        "Accuracy": float((tp + tn) / cm.sum()),
+        "Precision": float(precision),
+        "Recall": float(recall),
+        "F1": float(f1),
+        "AUC": float(auc(fpr, tpr)),
+    }
+    curves = {
+        "confusion_matrix": cm,
+        "fpr": fpr.astype(np.float32),
+        "tpr": tpr.astype(np.float32),
+    }
+    return metrics, curves
+
+
+def save_classification_report(y_true, y_pred, model_name, save_dir=PLOTS_DIR):
+    """Save classification report as text file."""
+    os.makedirs(save_dir, exist_ok=True)
+    report_path = os.path.join(save_dir, f"{model_name}_classification_report.txt")
+    with open(report_path, "w") as f:
+        f.write(classification_report(y_true, y_pred))
+    return report_path
+
+
+def save_curves(curves_by_model, path=CURVES_FILE):
+    """Store every model's curve data in one compressed .npz (keys: '<model>__<array>')."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    arrays = {f"{name}__{key}": value
+              for name, curves in curves_by_model.items()
+              for key, value in curves.items()}
+    np.savez_compressed(path, **arrays)
+    record_files(written=[path])
+    return path
+
+
+def load_curves(path=CURVES_FILE):
+    """{model: {array name: ndarray}} as written by save_curves()."""
+    curves = {}
+    with np.load(path) as data:
+        for key in data.files:
+            name, array = key.rsplit("__", 1)
+            curves.setdefault(name, {})[array] = data[key]
+    return curves
+
+
+def plot_confusion_matrix(cm, model_name, save_dir=PLOTS_DIR):
+    """Generate and save confusion matrix heatmap."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(6, 5))
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
+                xticklabels=CLASS_LABELS, yticklabels=CLASS_LABELS)
+    plt.xlabel("Predicted")
+    plt.ylabel("Actual")
+    plt.title(f"Confusion Matrix - {model_name}")
+    path = os.path.join(save_dir, f"{model_name}_confusion_matrix.png")
+    plt.savefig(path)
+    plt.close()
+    return path
+
+
+def plot_roc_curve(fpr, tpr, model_name, save_dir=PLOTS_DIR):
+    """Generate and save ROC curve with AUC score."""
+    import matplotlib.pyplot as plt
+
+    roc_auc = auc(fpr, tpr)
+    plt.figure(figsize=(6, 5))
+    plt.plot(fpr, tpr, color="blue", lw=2, label=f"AUC = {roc_auc:.4f}")
+    plt.plot([0, 1], [0, 1], color="red", linestyle="--")
+    plt.xlim([0.0, 1.0])
+    plt.ylim([0.0, 1.05])
+    plt.xlabel("False Positive Rate")
+    plt.ylabel("True Positive Rate")
+    plt.title(f"ROC Curve - {model_name}")
+    plt.legend(loc="lower right")
+    path = os.path.join(save_dir, f"{model_name}_roc_curve.png")
+    plt.savefig(path)
+    plt.close()
+    return path
+
+
+def render_plots(path=CURVES_FILE, save_dir=None, models=None):
+    """Render confusion matrices and ROC curves from stored curve data. Returns the PNG paths."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+    save_dir = save_dir or os.path.dirname(path) or "."
+    os.makedirs(save_dir, exist_ok=True)
+    written = []
+    with track_stage("train.plots"):
+        for name, curves in load_curves(path).items():
+            if models and name not in models:
+                continue
+            written.append(plot_confusion_matrix(curves["confusion_matrix"], name, save_dir))
+            written.append(plot_roc_curve(curves["fpr"], curves["tpr"], name, save_dir))
+        record_files(read=[path], written=written)
+    logger.info(f"Rendered {len(written)} plots from {path} into {save_dir}")
+    return written
+
+
+def start_rendering(path=CURVES_FILE, mode=None):
+    """
+    Render plots for stored curve data according to `mode` (default CHURN_PLOT_MODE):
+    - sync: in this process, before returning
+    - background: in a detached process, so training returns without waiting for matplotlib
+      (its errors, and anything it prints to stderr, go to the modeling log)
+    - deferred: not at all; run `python -m src.modeling.reporting` when the plots are needed
+    """
+    mode = mode or PLOT_MODE
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode {mode!r}, expected one of {PLOT_MODES}")
+
+    if mode == "sync":
+        render_plots(path)
+    elif mode == "background":
+        with open(LOG_FILES["src.modeling"], "ab") as log_file:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "src.modeling.reporting", "--curves", path],
+                stdout=subprocess.DEVNULL, stderr=log_file, start_new_session=True,
+            )
+        logger.info(f"Rendering plots in background process {proc.pid}")
+    else:
+        logger.info(f"Plot rendering deferred; run `python -m src.modeling.reporting --curves {path}`")
+    return mode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render evaluation plots from stored curve data")
+    parser.add_argument("--curves", default=CURVES_FILE, help="curves .npz written by training")
+    parser.add_argument("--out", default=None, help="output directory (default: next to the curves file)")
+    parser.add_argument("--models", nargs="*", default=None, help="only render these models")
+    args = parser.parse_args(argv)
+
+    try:
+        written = render_plots(args.curves, args.out, args.models)
+    except Exception:
+        logger.exception(f"Rendering plots from {args.curves} failed")
+        sys.exit(1)
+    print(f"✅ Rendered {len(written)} plots")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# src/modeling/selection.py
+"""
+Cross-validated model selection.
+
+The training data is written once as memory-mapped .npy arrays together with the
+stratified fold assignment, so every worker process maps the same pages instead of
+receiving its own pickled copy. One job per (model, fold) runs in a process pool;
+each fold's scores and out-of-fold probabilities (not the fitted model) are cached
+under a key of (data, model parameters, fold), so a rerun only refits candidates
+whose data or hyperparameters changed. The cache keeps the CV_CACHE_MAX_ENTRIES most
+recently used entries.
+"""
+import os
+import time
+import shutil
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import StratifiedKFold
+
+from src.modeling.reporting import binary_metrics
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import track_stage, record_rows
+
+logger = get_logger(__name__)
+
+# Folds for model selection (0 or 1 = select on the single holdout split, as before)
+CV_FOLDS = int(os.environ.get("CHURN_CV_FOLDS", "0"))
+CV_CACHE_DIR = os.environ.get("CHURN_CV_CACHE_DIR", os.path.join("models", "cv_cache"))
+CV_CACHE_MAX_ENTRIES = int(os.environ.get("CHURN_CV_CACHE_ENTRIES", "500"))   # (model, fold) results kept
+CACHE_VERSION = 2   # bump when the cached entry format changes
+SELECTION_METRIC = "F1"
+METRICS = ["Accuracy", "Precision", "Recall", "F1", "AUC"]
+
+
+def share_arrays(X, y, n_folds, folder, seed=42):
+    """
+    Write features (float32), labels and each row's stratified fold number to `folder`
+    as .npy files. Returns a fingerprint of the data + folds used in the cache keys.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.int8)
+    folds = np.empty(len(y), dtype=np.int8)
+    cv = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    for fold, (_, test_idx) in enumerate(cv.split(np.zeros(len(y)), y)):
+        folds[test_idx] = fold
+    for name, array in (("X", X), ("y", y), ("folds", folds)):
+        np.save(os.path.join(folder, f"{name}.npy"), array)
+    return joblib.hash((X, y, folds))
+
+
+def load_shared(folder):
+    """Memory-mapped (read-only) views of the arrays written by share_arrays()."""
+    return tuple(np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r") for name in ("X", "y", "folds"))
+
+
+def fold_key(data_hash, name, model, fold):
+    """Cache key of one fold fit: data, model class + hyperparameters (minus n_jobs), library version."""
+    params = {k: v for k, v in model.get_params().items() if not k.endswith("n_jobs")}
+    return joblib.hash((data_hash, name, type(model).__name__, repr(sorted(params.items())),
+                        fold, sklearn.__version__, CACHE_VERSION))
+
+
+def fit_fold(name, model, fold, data_dir, data_hash, cache_dir):
+    """Fit one candidate on all folds but `fold` and score it on `fold` (cached). Runs in a worker."""
+    key = fold_key(data_hash, name, model, fold)
+    cache_path = os.path.join(cache_dir, f"{name}_fold{fold}_{key}.joblib")
+    if os.path.exists(cache_path):
+        entry = joblib.load(cache_path)
+        os.utime(cache_path)   # recently used: kept by prune_cache()
+        return {"Model": name, "Fold": fold, **entry["metrics"], "FitSeconds": entry["fit_seconds"], "Cached": True}
+
+    X, y, folds = load_shared(data_dir)
+    train_mask = folds != fold
+    model = clone(model)
+    with track_stage(f"train.cv.{name}.fold{fold}"):
+        start = time.perf_counter()
+        model.fit(X[train_mask], y[train_mask])
+        fit_seconds = time.perf_counter() - start
+        record_rows(rows_in=int(train_mask.sum()))
+
+    X_val, y_val = X[~train_mask], y[~train_mask]
+    preds = model.predict(X_val)
+    if hasattr(model, "predict_proba"):
+        y_proba = model.predict_proba(X_val)[:, 1]
+    else:
+        y_proba = model.decision_function(X_val)
+    metrics, _ = binary_metrics(y_val, preds, y_proba)
+
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    entry = {"metrics": metrics, "fit_seconds": fit_seconds,
+             "proba": np.asarray(y_proba, dtype=np.float32)}   # out-of-fold, in row order of the fold
+    joblib.dump(entry, tmp_path)
+    os.replace(tmp_path, cache_path)
+    return {"Model": name, "Fold": fold, **metrics, "FitSeconds": fit_seconds, "Cached": False}
+
+
+def prune_cache(cache_dir=CV_CACHE_DIR, max_entries=None):
+    """Delete all but the `max_entries` most recently used fold results (and temp files of crashed runs)."""
+    max_entries = CV_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+    paths = [os.path.join(cache_dir, f) for f in os.listdir(cache_dir)]
+    entries = sorted((p for p in paths if p.endswith(".joblib")), key=os.path.getmtime, reverse=True)
+    abandoned = [p for p in paths if p.endswith(".tmp") and time.time() - os.path.getmtime(p) > 3600]
+    stale = abandoned + entries[max_entries:]
+    for path in stale:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    if stale:
+        logger.info(f"Pruned {len(stale)} entries from the CV cache {cache_dir}")
+    return len(stale)
+
+
+def summarize_folds(fold_results):
+    """Per-model mean/std of every metric plus fit cost (mean and total seconds, cached folds)."""
+    df = pd.DataFrame(fold_results)
+    grouped = df.groupby("Model", sort=False)
+    summary = pd.concat([
+        grouped[METRICS].mean().add_suffix("_mean"),
+        grouped[METRICS].std(ddof=1).add_suffix("_std"),
+        grouped["FitSeconds"].agg(FitSeconds_mean="mean", FitSeconds_total="sum"),
+        grouped["Cached"].sum().rename("CachedFolds").astype(int),
+    ], axis=1)
+    return summary.reset_index()
+
+
+def select_model(models, X, y, n_folds=None, workers=1, cache_dir=CV_CACHE_DIR):
+    """
+    Score every candidate in `models` with stratified k-fold CV, all (model, fold) fits
+    running in parallel on memory-mapped data. Returns (best model name, summary DataFrame
+    sorted as `models`), the best having the highest mean F1.
+    """
+    n_folds = n_folds or CV_FOLDS
+    os.makedirs(cache_dir, exist_ok=True)
+    data_dir = tempfile.mkdtemp(prefix="churn_cv_")
+    try:
+        data_hash = share_arrays(X, y, n_folds, data_dir)
+        logger.info(f"Cross-validating {len(models)} models x {n_folds} folds with {workers} workers")
+        fold_results = Parallel(n_jobs=workers, backend="loky")(
+            delayed(fit_fold)(name, model, fold, data_dir, data_hash, cache_dir)
+            for name, model in models.items()
+            for fold in range(n_folds)
+        )
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    prune_cache(cache_dir)
+
+    summary = summarize_folds(fold_results)
+    for row in summary.itertuples(index=False):
+        logger.info(f"{row.Model}: CV F1={row.F1_mean:.4f}±{row.F1_std:.4f}, AUC={row.AUC_mean:.4f}, "
+                    f"fit={row.FitSeconds_mean:.2f}s/fold, cached folds={row.CachedFolds}/{n_folds}")
+    best = summary.loc[summary[f"{SELECTION_METRIC}_mean"].idxmax(), "Model"]
+    return best, summary
@@ -1,168 +1,307 @@
 # src/modeling/train.py
 
 import os
-import logging
-import joblib
+import json
+import time
+from joblib import Parallel, delayed
 import mlflow
-import mlflow.sklearn
 from datetime import datetime
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.svm import SVC
+from sklearn.svm import SVC, LinearSVC
+from sklearn.kernel_approximation import Nystroem
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.pipeline import make_pipeline
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from xgboost import XGBClassifier
 
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    classification_report, confusion_matrix, roc_curve, auc
+from src.storage.intermediate import data_path, read_frame
+from src.preprocessing.preprocess import ID_COLUMNS, TARGET
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import track_stage, instrumented, record_rows, record_files
+from src.monitoring.drift import promote_baseline
+from src.modeling.selection import CV_FOLDS, select_model
+from src.modeling.artifacts import LATEST_MODEL_FILE, save_bundle
+from src.pipeline.cache import write_run_manifest
+from src.modeling.reporting import (
+    PLOTS_DIR, binary_metrics, save_classification_report, save_curves, start_rendering
 )
 
+CLEAN_FILE = data_path(os.path.join("data", "processed", "clean_churn"))
+
 # ---------------- Logging ---------------- #
-logging.basicConfig(
-    filename="modeling.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logger = get_logger(__name__)
+
+
+# Models whose fit can use several cores; they receive the per-model n_jobs budget
+PARALLEL_MODELS = {"RandomForest", "KNN", "XGBoost"}
+# Number of models fitted at the same time (0 = one per core, up to the number of models)
+TRAIN_WORKERS = int(os.environ.get("CHURN_TRAIN_WORKERS", "0"))
+# Above this many training rows the exact kernel SVM is replaced by SVM_Nystroem
+SVM_APPROX_THRESHOLD = int(os.environ.get("CHURN_SVM_APPROX_ROWS", "50000"))
+# Train both SVM variants on all rows as candidates (their fit time and scores in the report)
+SVM_COMPARE = os.environ.get("CHURN_SVM_COMPARE", "0") == "1"
+# Otherwise every run compares them on a stratified sample of this many rows (0 = off)
+SVM_COMPARE_ROWS = int(os.environ.get("CHURN_SVM_COMPARE_ROWS", "2000"))
+NYSTROEM_COMPONENTS = 300
+# Best hyperparameters per model written by src/modeling/tune.py (used when present)
+TUNED_PARAMS_FILE = "models/tuned_params.json"
+# Out-of-core training (src/modeling/streaming.py) for data larger than memory
+STREAMING_TRAIN = os.environ.get("CHURN_STREAMING_TRAIN", "0") == "1"
+
+
+def build_approx_svm():
+    """
+    Scalable RBF-SVM: Nystroem kernel approximation + linear SVM, with
+    sigmoid-calibrated probabilities. Fit time grows linearly with row count,
+    unlike SVC(probability=True) (super-linear kernel fit + internal 5-fold Platt scaling).
+    """
+    return make_pipeline(
+        Nystroem(kernel="rbf", n_components=NYSTROEM_COMPONENTS, random_state=42),
+        CalibratedClassifierCV(LinearSVC(dual=False, random_state=42), method="sigmoid", cv=3),
+    )
+
+
+def build_svms(n_rows=0, compare=None):
+    """Exact SVM below SVM_APPROX_THRESHOLD rows, the approximate one above (or both to compare)."""
+    compare = SVM_COMPARE if compare is None else compare
+    svms = {}
+    if compare or n_rows <= SVM_APPROX_THRESHOLD:
+        svms["SVM"] = SVC(probability=True, random_state=42)
+    if compare or n_rows > SVM_APPROX_THRESHOLD:
+        svms["SVM_Nystroem"] = build_approx_svm()
+    return svms
 
 
-def plot_confusion_matrix(y_true, y_pred, model_name, save_dir):
-    """Generate and save confusion matrix heatmap."""
-    cm = confusion_matrix(y_true, y_pred)
-    plt.figure(figsize=(6, 5))
-    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues",
-                xticklabels=["No Churn", "Churn"],
-                yticklabels=["No Churn", "Churn"])
-    plt.xlabel("Predicted")
-    plt.ylabel("Actual")
-    plt.title(f"Confusion Matrix - {model_name}")
-    os.makedirs(save_dir, exist_ok=True)
-    plt.savefig(os.path.join(save_dir, f"{model_name}_confusion_matrix.png"))
-    plt.close()
-
-
-def plot_classification_report(y_true, y_pred, model_name, save_dir):
-    """Save classification report as text file."""
-    report = classification_report(y_true, y_pred)
-    report_path = os.path.join(save_dir, f"{model_name}_classification_report.txt")
-    with open(report_path, "w") as f:
-        f.write(report)
-
-
-def plot_roc_curve(y_true, y_proba, model_name, save_dir):
-    """Generate and save ROC curve with AUC score."""
-    fpr, tpr, _ = roc_curve(y_true, y_proba)
-    roc_auc = auc(fpr, tpr)
-
-    plt.figure(figsize=(6, 5))
-    plt.plot(fpr, tpr, color="blue", lw=2, label=f"AUC = {roc_auc:.4f}")
-    plt.plot([0, 1], [0, 1], color="red", linestyle="--")
-    plt.xlim([0.0, 1.0])
-    plt.ylim([0.0, 1.05])
-    plt.xlabel("False Positive Rate")
-    plt.ylabel("True Positive Rate")
-    plt.title(f"ROC Curve - {model_name}")
-    plt.legend(loc="lower right")
-
-    os.makedirs(save_dir, exist_ok=True)
-    plt.savefig(os.path.join(save_dir, f"{model_name}_roc_curve.png"))
-    plt.close()
-
-    return roc_auc
-
-
-def train_and_evaluate():
+def load_tuned_params(path=TUNED_PARAMS_FILE):
+    """Tuned hyperparameters per model name ({} if tuning has not run)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: entry["params"] for name, entry in json.load(f).items()}
+
+
+def build_models(n_jobs=1, n_rows=0, params=None):
+    """
+    Candidate models; `n_jobs` is the core budget given to each multi-threaded model
+    and `n_rows` (training rows) selects the SVM variant.
+    `params` maps model names to hyperparameters overriding the defaults.
+    """
+    models = {
+        "LogisticRegression": LogisticRegression(max_iter=1000),
+        "RandomForest": RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs),
+        "GradientBoosting": GradientBoostingClassifier(random_state=42),
+        **build_svms(n_rows),
+        "DecisionTree": DecisionTreeClassifier(random_state=42),
+        "KNN": KNeighborsClassifier(n_jobs=n_jobs),
+        "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42,
+                                 n_jobs=n_jobs)
+    }
+    for name, model_params in (params or {}).items():
+        if name in models:
+            models[name].set_params(**model_params)
+    return models
+
+
+def _sample(X, y, rows):
+    """Stratified sample of at most `rows` rows."""
+    if len(X) <= rows:
+        return X, y
+    X, _, y, _ = train_test_split(X, y, train_size=rows, random_state=42, stratify=y)
+    return X, y
+
+
+def compare_svms(X_train, y_train, X_test, y_test, rows=None):
+    """
+    Fit the exact and the Nystroem SVM on a stratified sample of `rows` training rows
+    (default SVM_COMPARE_ROWS) and score both on a test sample of the same size, so the
+    approximation's score/fit-time trade-off is known on every run at a bounded cost.
+    Returns one metrics record per variant ([] with rows=0).
+    """
+    rows = SVM_COMPARE_ROWS if rows is None else rows
+    if rows <= 0:
+        return []
+    X_fit, y_fit = _sample(X_train, y_train, rows)
+    X_eval, y_eval = _sample(X_test, y_test, rows)
+    records = []
+    with track_stage("train.svm_compare"):
+        for name, model in build_svms(compare=True).items():
+            start = time.perf_counter()
+            model.fit(X_fit, y_fit)
+            fit_seconds = time.perf_counter() - start
+            metrics, _ = binary_metrics(y_eval, model.predict(X_eval), model.predict_proba(X_eval)[:, 1])
+            records.append({"Model": name, "Rows": len(X_fit), **metrics, "FitSeconds": fit_seconds})
+            logger.info(f"SVM comparison ({len(X_fit)} rows) {name}: F1={metrics['F1']:.4f}, "
+                        f"AUC={metrics['AUC']:.4f}, FitSeconds={fit_seconds:.2f}")
+    return records
+
+
+def plan_workers(n_models, max_workers=None):
+    """
+    Split the machine's cores between concurrent fits and per-model threads.
+    Returns (workers, n_jobs_per_model) with workers * n_jobs_per_model <= cores.
+    """
+    cores = os.cpu_count() or 1
+    requested = max_workers if max_workers is not None else TRAIN_WORKERS
+    workers = min(requested or cores, n_models, cores)
+    workers = max(1, workers)
+    return workers, max(1, cores // workers)
+
+
+def fit_and_evaluate(name, model, X_train, y_train, X_test, y_test):
+    """Fit one model and score it on the test split. Runs inside a worker process."""
+    logger.info(f"Training model: {name}")
+    with track_stage(f"train.fit.{name}"):
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+        record_rows(rows_in=len(X_train))
+
+    preds = model.predict(X_test)
+
+    # Predict probabilities for ROC
+    if hasattr(model, "predict_proba"):
+        y_proba = model.predict_proba(X_test)[:, 1]
+    else:  # SVM fallback (uses decision_function)
+        y_proba = model.decision_function(X_test)
+        y_proba = (y_proba - y_proba.min()) / (y_proba.max() - y_proba.min())
+
+    metrics, curves = binary_metrics(y_test, preds, y_proba)
+    metrics["FitSeconds"] = fit_seconds
+    return {
+        "name": name,
+        "model": model,
+        "preds": preds,
+        "curves": curves,
+        "metrics": metrics,
+    }
+
+
+@instrumented("train")
+def train_and_evaluate(max_workers=None, streaming=None, plot_mode=None, cv_folds=None):
     """
     Train and evaluate multiple ML models for churn prediction.
     Models: Logistic Regression, Random Forest, Gradient Boosting, SVM, Decision Tree, KNN, XGBoost
-    Metrics: Accuracy, Precision, Recall, F1, AUC
-    Saves: Best model (.pkl), performance reports, confusion matrices, classification reports, ROC curves
+            (SVM is the Nystroem approximation above SVM_APPROX_THRESHOLD training rows;
+            both are compared on a SVM_COMPARE_ROWS sample in reports/svm_comparison_*.csv,
+            or CHURN_SVM_COMPARE=1 trains both on all rows as candidates)
+    Metrics: Accuracy, Precision, Recall, F1, AUC, fit time
+    Saves: Best model bundle (models/bundles/, see artifacts.py), performance reports,
+           classification reports, curve data
+           (reports/plots/curves.npz) rendered to confusion matrix / ROC plots per CHURN_PLOT_MODE
+
+    Models are fitted concurrently in a process pool of `max_workers` processes
+    (default: CHURN_TRAIN_WORKERS, or one per core). Cores are shared out so that
+    workers x per-model n_jobs never exceeds the machine; 1 runs everything in-process.
+    Results do not depend on the worker count: seeds are fixed and models are
+    compared in declaration order.
+
+    cv_folds=k (or CHURN_CV_FOLDS=k) selects the model by mean F1 over stratified k-fold CV
+    on the training split instead (all model x fold fits in parallel on memory-mapped
+    data, fold models cached, see src/modeling/selection.py); only the selected model is
+    then refitted and evaluated on the test split.
+
+    streaming=True (or CHURN_STREAMING_TRAIN=1) trains out-of-core instead, on chunks
+    of the clean data, with incremental learners (see src/modeling/streaming.py).
+    Either way the profile of the merged batch becomes the drift baseline (src/monitoring).
+
+    Plots are not drawn in the training loop: `plot_mode` (default CHURN_PLOT_MODE, "sync")
+    renders them in-process ("sync"), in a detached process ("background") or only
+    on demand ("deferred", see src/modeling/reporting.py).
     """
+    if STREAMING_TRAIN if streaming is None else streaming:
+        from src.modeling.streaming import train_streaming
+        result = train_streaming(CLEAN_FILE)
+        promote_baseline()
+        return result
 
     try:
         # ---------------- Load Data ---------------- #
-        data_path = os.path.join("data", "processed", "clean_churn.csv")
-        df = pd.read_csv(data_path)
+        df = read_frame(CLEAN_FILE)
 
-        X = df.drop("Churn", axis=1)   # Features
-        y = df["Churn"]               # Target
+        X = df.drop(columns=[TARGET] + [c for c in ID_COLUMNS if c in df.columns])   # Features
+        y = df[TARGET]                # Target (0/1)
+        record_rows(rows_in=len(df))
+        record_files(read=[CLEAN_FILE])
 
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42, stratify=y
         )
 
         # ---------------- Models to Try ---------------- #
-        models = {
-            "LogisticRegression": LogisticRegression(max_iter=1000),
-            "RandomForest": RandomForestClassifier(n_estimators=100, random_state=42),
-            "GradientBoosting": GradientBoostingClassifier(random_state=42),
-            "SVM": SVC(probability=True, random_state=42),
-            "DecisionTree": DecisionTreeClassifier(random_state=42),
-            "KNN": KNeighborsClassifier(),
-            "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric="logloss", random_state=42)
-        }
+        n_rows = len(X_train)
+        tuned_params = load_tuned_params()
+        candidates = list(build_models(n_rows=n_rows))
+
+        # ---------------- Model Selection (k-fold CV) ---------------- #
+        cv_folds = CV_FOLDS if cv_folds is None else cv_folds
+        cv_summary = None
+        if cv_folds > 1:
+            cv_workers, cv_n_jobs = plan_workers(len(candidates) * cv_folds, max_workers)
+            cv_models = build_models(n_jobs=cv_n_jobs, n_rows=n_rows, params=tuned_params)
+            best_cv, cv_summary = select_model(cv_models, X_train, y_train, cv_folds, cv_workers)
+            candidates = [best_cv]   # only the selected model is refitted and tested below
+
+        workers, n_jobs = plan_workers(len(candidates), max_workers)
+        models = {name: model for name, model in
+                  build_models(n_jobs=n_jobs, n_rows=n_rows, params=tuned_params).items()
+                  if name in candidates}
+        logger.info(f"Fitting {len(models)} models with {workers} workers x {n_jobs} threads "
+                    f"(tuned: {sorted(tuned_params) or 'none'})")
 
         best_model = None
         best_score = 0
         report_lines = []
         metrics_records = []
+        class_report_paths = []
 
         # Directories
         os.makedirs("models", exist_ok=True)
-        os.makedirs("reports/plots", exist_ok=True)
-
-        # ---------------- Train & Evaluate ---------------- #
-        for name, model in models.items():
-            logging.info(f"Training model: {name}")
-            model.fit(X_train, y_train)
-            preds = model.predict(X_test)
-
-            # Predict probabilities for ROC
-            if hasattr(model, "predict_proba"):
-                y_proba = model.predict_proba(X_test)[:, 1]
-            else:  # SVM fallback (uses decision_function)
-                y_proba = model.decision_function(X_test)
-                y_proba = (y_proba - y_proba.min()) / (y_proba.max() - y_proba.min())
-
-            acc = accuracy_score(y_test, preds)
-            prec = precision_score(y_test, preds)
-            rec = recall_score(y_test, preds)
-            f1 = f1_score(y_test, preds)
-            auc_score = plot_roc_curve(y_test, y_proba, name, "reports/plots")
+        os.makedirs(PLOTS_DIR, exist_ok=True)
+
+        # ---------------- Train & Evaluate (parallel) ---------------- #
+        results = Parallel(n_jobs=workers, backend="loky")(
+            delayed(fit_and_evaluate)(name, model, X_train, y_train, X_test, y_test)
+            for name, model in models.items()
+        )
+
+        # ---------------- Reports (main process) ---------------- #
+        for result in results:
+            name, model, preds = result["name"], result["model"], result["preds"]
+            metrics = result["metrics"]
 
             report_lines.append(
-                f"{name}: Accuracy={acc:.4f}, Precision={prec:.4f}, Recall={rec:.4f}, F1={f1:.4f}, AUC={auc_score:.4f}"
+                f"{name}: Accuracy={metrics['Accuracy']:.4f}, Precision={metrics['Precision']:.4f}, "
+                f"Recall={metrics['Recall']:.4f}, F1={metrics['F1']:.4f}, AUC={metrics['AUC']:.4f}, "
+                f"FitSeconds={metrics['FitSeconds']:.2f}"
             )
-            logging.info(report_lines[-1])
-
-            metrics_records.append({
-                "Model": name,
-                "Accuracy": acc,
-                "Precision": prec,
-                "Recall": rec,
-                "F1": f1,
-                "AUC": auc_score
-            })
+            logger.info(report_lines[-1])
+
+            metrics_records.append({"Model": name, **metrics})
 
-            # Save plots and reports
-            plot_confusion_matrix(y_test, preds, name, "reports/plots")
-            plot_classification_report(y_test, preds, name, "reports/plots")
+            class_report_paths.append(save_classification_report(y_test, preds, name, PLOTS_DIR))
 
-            if f1 > best_score:  # Select best by F1
-                best_score = f1
+            if metrics["F1"] > best_score:  # Select best by F1
+                best_score = metrics["F1"]
                 best_model = model
                 best_name = name
+                best_metrics = metrics
+
+        # Exact vs approximate SVM trade-off (already in the report when both are candidates)
+        svm_records = [] if SVM_COMPARE else compare_svms(X_train, y_train, X_test, y_test)
+
+        # ---------------- Plots (deferred) ---------------- #
+        curves_path = save_curves({r["name"]: r["curves"] for r in results})
+        start_rendering(curves_path, plot_mode)
 
         # ---------------- Save Best Model ---------------- #
-        model_path = f"models/{best_name}_churn_model.pkl"
-        joblib.dump(best_model, model_path)
-        logging.info(f"Saved best model: {best_name} at {model_path}")
+        bundle_path = save_bundle(best_model, best_name, metrics=best_metrics, feature_names=list(X.columns))
+        logger.info(f"Saved best model: {best_name} at {bundle_path}")
 
         # ---------------- Save Report ---------------- #
         os.makedirs("reports", exist_ok=True)
@@ -174,26 +313,54 @@ def train_and_evaluate():
             f.write("\n".join(report_lines))
 
         pd.DataFrame(metrics_records).to_csv(csv_report_path, index=False)
-
-        logging.info(f"Model performance reports saved: {txt_report_path}, {csv_report_path}")
+        cv_report_path = None
+        if cv_summary is not None:
+            cv_report_path = f"reports/model_selection_{timestamp}.csv"
+            cv_summary.to_csv(cv_report_path, index=False)
+            logger.info(f"Cross-validation summary saved: {cv_report_path}")
+        svm_report_path = None
+        if svm_records:
+            svm_report_path = f"reports/svm_comparison_{timestamp}.csv"
+            pd.DataFrame(svm_records).to_csv(svm_report_path, index=False)
+
+        logger.info(f"Model performance reports saved: {txt_report_path}, {csv_report_path}")
 
         # ---------------- MLflow Logging ---------------- #
         mlflow.set_experiment("ChurnPrediction")
         with mlflow.start_run():
-            mlflow.log_params({"best_model": best_name})
+            mlflow.log_params({"best_model": best_name, "train_workers": workers, "model_n_jobs": n_jobs})
             mlflow.log_metrics({
-                "accuracy": acc,
-                "precision": prec,
-                "recall": rec,
-                "f1": f1,
-                "auc": auc_score
+                "accuracy": best_metrics["Accuracy"],
+                "precision": best_metrics["Precision"],
+                "recall": best_metrics["Recall"],
+                "f1": best_metrics["F1"],
+                "auc": best_metrics["AUC"],
+                "fit_seconds": best_metrics["FitSeconds"],
             })
-            mlflow.sklearn.log_model(best_model, best_name)
+            if cv_summary is not None:
+                best_cv_row = cv_summary.set_index("Model").loc[best_name]
+                mlflow.log_param("cv_folds", cv_folds)
+                mlflow.log_metrics({"cv_f1_mean": best_cv_row["F1_mean"], "cv_f1_std": best_cv_row["F1_std"],
+                                    "cv_auc_mean": best_cv_row["AUC_mean"],
+                                    "cv_fit_seconds_total": best_cv_row["FitSeconds_total"]})
+            for record in svm_records:
+                prefix = "svm_nystroem" if record["Model"] == "SVM_Nystroem" else "svm_exact"
+                mlflow.log_metrics({f"{prefix}_f1": record["F1"], f"{prefix}_auc": record["AUC"],
+                                    f"{prefix}_fit_seconds": record["FitSeconds"]})
+            mlflow.log_artifacts(bundle_path, artifact_path="model_bundle")
+
+        # The data this model was trained on becomes the reference for drift checks
+        promote_baseline()
+
+        # Files of this run, tracked by the pipeline cache (models/latest_model.json)
+        write_run_manifest(LATEST_MODEL_FILE, [bundle_path, txt_report_path, csv_report_path, cv_report_path,
+                                               svm_report_path, curves_path, *class_report_paths],
+                           model=best_name, bundle=bundle_path, created_at=timestamp)
 
         print(f"✅ Training complete. Best model: {best_name}, F1={best_score:.4f}")
 
     except Exception as e:
-        logging.error(f"Error in model training: {str(e)}")
+        logger.error(f"Error in model training: {str(e)}")
         raise
 
 
@@ -0,0 +1,156 @@
+# src/modeling/tune.py
+
+import os
+import json
+from datetime import datetime
+
+import mlflow
+from scipy.stats import loguniform, randint, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401 (enables the import below)
+from sklearn.model_selection import HalvingRandomSearchCV, StratifiedKFold, train_test_split
+
+from src.storage.intermediate import read_frame
+from src.preprocessing.preprocess import ID_COLUMNS, TARGET
+from src.modeling.train import CLEAN_FILE, TUNED_PARAMS_FILE, build_models, plan_workers
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+# Search spaces, keyed like build_models()
+PARAM_SPACE = {
+    "LogisticRegression": {
+        "C": loguniform(1e-3, 1e2),
+    },
+    "RandomForest": {
+        "n_estimators": randint(100, 500),
+        "max_depth": [None, 6, 10, 16],
+        "min_samples_leaf": randint(1, 20),
+        "max_features": ["sqrt", "log2", 0.5],
+    },
+    "GradientBoosting": {
+        "n_estimators": randint(50, 400),
+        "learning_rate": loguniform(1e-2, 3e-1),
+        "max_depth": randint(2, 6),
+        "subsample": uniform(0.6, 0.4),
+    },
+    "SVM": {
+        "C": loguniform(1e-2, 1e2),
+        "gamma": loguniform(1e-4, 1e-1),
+    },
+    "SVM_Nystroem": {
+        "nystroem__gamma": loguniform(1e-4, 1e-1),
+        "calibratedclassifiercv__estimator__C": loguniform(1e-2, 1e2),
+    },
+    "DecisionTree": {
+        "max_depth": randint(2, 20),
+        "min_samples_leaf": randint(1, 50),
+    },
+    "KNN": {
+        "n_neighbors": randint(3, 75),
+        "weights": ["uniform", "distance"],
+    },
+    "XGBoost": {
+        "n_estimators": randint(100, 600),
+        "learning_rate": loguniform(1e-2, 3e-1),
+        "max_depth": randint(2, 10),
+        "subsample": uniform(0.6, 0.4),
+        "colsample_bytree": uniform(0.5, 0.5),
+        "min_child_weight": loguniform(1e-1, 1e1),
+    },
+}
+
+N_CANDIDATES = 27        # configurations sampled per model family in the first round
+HALVING_FACTOR = 3       # keep 1/3 of the configurations per round, with 3x the rows
+MIN_RESOURCES = 500      # training rows given to every configuration in the first round
+CV_FOLDS = 3
+
+
+def log_trials_to_mlflow(name, search):
+    """One nested MLflow run per trial (configuration x halving round)."""
+    results = search.cv_results_
+    for i in range(len(results["params"])):
+        with mlflow.start_run(run_name=f"{name}_trial_{i}", nested=True):
+            mlflow.log_params({"model": name, **results["params"][i]})
+            mlflow.log_metrics({
+                "mean_f1": float(results["mean_test_score"][i]),
+                "std_f1": float(results["std_test_score"][i]),
+                "halving_iter": int(results["iter"][i]),
+                "n_resources": int(results["n_resources"][i]),
+                "fit_seconds": float(results["mean_fit_time"][i]),
+            })
+
+
+def tune_models(model_names=None, max_workers=None, n_candidates=N_CANDIDATES,
+                factor=HALVING_FACTOR, min_resources=MIN_RESOURCES):
+    """
+    Hyperparameter search with successive halving for each model family.
+    - each family starts with `n_candidates` random configurations on `min_resources` rows
+    - after every round only the best 1/`factor` survive and get `factor` times more rows
+    - trials run in parallel (one per core), models themselves single-threaded
+    - every trial is logged to MLflow as a nested run
+    Saves the best configuration per family to TUNED_PARAMS_FILE, which
+    train_and_evaluate() picks up; families not tuned in this run keep their saved entry.
+    """
+    try:
+        df = read_frame(CLEAN_FILE)
+        X = df.drop(columns=[TARGET] + [c for c in ID_COLUMNS if c in df.columns])
+        y = df[TARGET]
+
+        # Tune on the training split only; the test split stays untouched for model selection
+        X_train, _, y_train, _ = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+
+        models = build_models(n_jobs=1, n_rows=len(X_train))
+        names = [n for n in (model_names or models) if n in models and n in PARAM_SPACE]
+        workers, _ = plan_workers(CV_FOLDS * n_candidates, max_workers)
+        cv = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=42)
+
+        tuned = {}
+        mlflow.set_experiment("ChurnPrediction")
+        with mlflow.start_run(run_name=f"tuning_{datetime.now().strftime('%Y%m%d_%H%M%S')}"):
+            for name in names:
+                logger.info(f"Tuning model: {name}")
+                search = HalvingRandomSearchCV(
+                    models[name],
+                    PARAM_SPACE[name],
+                    n_candidates=n_candidates,
+                    factor=factor,
+                    resource="n_samples",
+                    min_resources=min(min_resources, len(X_train)),
+                    scoring="f1",
+                    cv=cv,
+                    n_jobs=workers,
+                    random_state=42,
+                    refit=False,
+                )
+                search.fit(X_train, y_train)
+                log_trials_to_mlflow(name, search)
+
+                params = {k: v.item() if hasattr(v, "item") else v for k, v in search.best_params_.items()}
+                tuned[name] = {"params": params, "cv_f1": float(search.best_score_)}
+                mlflow.log_metric(f"{name}_best_cv_f1", search.best_score_)
+                logger.info(f"{name}: best CV F1={search.best_score_:.4f} params={search.best_params_}")
+
+        saved = {}
+        if os.path.exists(TUNED_PARAMS_FILE):
+            with open(TUNED_PARAMS_FILE) as f:
+                saved = json.load(f)
+        os.makedirs(os.path.dirname(TUNED_PARAMS_FILE), exist_ok=True)
+        tmp_path = f"{TUNED_PARAMS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({**saved, **tuned}, f, indent=2)
+        os.replace(tmp_path, TUNED_PARAMS_FILE)
+        logger.info(f"Tuned parameters saved at {TUNED_PARAMS_FILE} "
+                    f"(kept from earlier runs: {sorted(set(saved) - set(tuned)) or 'none'})")
+
+        print(f"✅ Tuning complete for {len(tuned)} models. Parameters saved at {TUNED_PARAMS_FILE}")
+        return tuned
+
+    except Exception as e:
+        logger.error(f"Error in hyperparameter tuning: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    tune_models()
@@ -0,0 +1,137 @@
+"""
+Drift checks of ingested batches against the training baseline, from sketches only.
+
+Every merge profiles the merged batch (src/monitoring/profile.py); the profile is
+saved, folded into a cumulative history profile and compared with the baseline, the
+profile of the batch the current model was trained on (promoted by training).
+Numeric columns are compared with PSI over baseline deciles and the KS statistic,
+categorical columns with PSI over their categories. Nothing is rescanned: cost and
+memory do not depend on the number of rows.
+"""
+import os
+import json
+import shutil
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from src.monitoring.profile import DatasetProfile
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+MONITOR_DIR = os.path.join("reports", "monitoring")
+BATCH_PROFILE = os.path.join(MONITOR_DIR, "batch_profile.joblib")
+HISTORY_PROFILE = os.path.join(MONITOR_DIR, "history_profile.joblib")
+BASELINE_PROFILE = os.path.join(MONITOR_DIR, "baseline_profile.joblib")
+DRIFT_REPORT = os.path.join(MONITOR_DIR, "drift_report.json")
+# Profile merged batches and check them for drift (cheap: sketches only)
+MONITORING = os.environ.get("CHURN_MONITORING", "1") == "1"
+
+PSI_BINS = 10
+PSI_EPSILON = 1e-4
+# metric -> (warning, drift) thresholds
+THRESHOLDS = {"psi": (0.1, 0.25), "ks": (0.05, 0.1)}
+
+DriftResult = namedtuple("DriftResult", ["column", "metric", "value", "status"])
+
+
+def psi(expected, actual):
+    """Population stability index of two discrete distributions (fractions)."""
+    expected = np.clip(np.asarray(expected, dtype=float), PSI_EPSILON, None)
+    actual = np.clip(np.asarray(actual, dtype=float), PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def numeric_drift(baseline, current, bins=PSI_BINS):
+    """(PSI over the baseline's quantile bins, KS statistic) of two KLL sketches."""
+    edges = np.unique(baseline.quantile(np.linspace(0, 1, bins + 1)[1:-1]))
+    expected = np.diff(np.concatenate([[0.0], baseline.cdf(edges), [1.0]]))
+    actual = np.diff(np.concatenate([[0.0], current.cdf(edges), [1.0]]))
+    points = np.union1d(baseline.support(), current.support())
+    ks = float(np.max(np.abs(baseline.cdf(points) - current.cdf(points))))
+    return psi(expected, actual), ks
+
+
+def categorical_drift(baseline, current):
+    """PSI over the union of categories of two count-min sketches (None if too many values)."""
+    if baseline.overflow or current.overflow:
+        return None
+    categories = sorted(baseline.tracked | current.tracked)
+    expected = baseline.estimate(categories) / max(baseline.total, 1)
+    actual = current.estimate(categories) / max(current.total, 1)
+    # remainder = hash-collision slack, kept so both distributions sum to 1
+    expected = np.append(expected, max(0.0, 1 - expected.sum()))
+    actual = np.append(actual, max(0.0, 1 - actual.sum()))
+    return psi(expected, actual)
+
+
+def _status(metric, value):
+    warning, drift = THRESHOLDS[metric]
+    return "drift" if value >= drift else "warning" if value >= warning else "ok"
+
+
+def compare_profiles(baseline, current):
+    """DriftResult per (column, metric) for the columns present in both profiles."""
+    results = []
+    for col, base in baseline.columns.items():
+        cur = current.columns.get(col)
+        if cur is None or cur.kind != base.kind:
+            continue
+        if base.kind == "numeric":
+            if not (base.quantiles.n and cur.quantiles.n):
+                continue
+            metrics = dict(zip(["psi", "ks"], numeric_drift(base.quantiles, cur.quantiles)))
+        else:
+            value = categorical_drift(base.frequencies, cur.frequencies)
+            if value is None:
+                continue
+            metrics = {"psi": value}
+        results.extend(DriftResult(col, metric, round(value, 6), _status(metric, value))
+                       for metric, value in metrics.items())
+    return results
+
+
+def record_batch(profile, report_path=DRIFT_REPORT):
+    """
+    Save the profile of a freshly merged batch, fold it into the history profile and
+    compare it with the training baseline (if any). Returns the drift results.
+    """
+    profile.save(BATCH_PROFILE)
+    history = DatasetProfile.load(HISTORY_PROFILE) if os.path.exists(HISTORY_PROFILE) else DatasetProfile()
+    history.merge(profile).save(HISTORY_PROFILE)
+
+    if not os.path.exists(BASELINE_PROFILE):
+        logger.info("No training baseline profile yet; drift check skipped")
+        return []
+    results = compare_profiles(DatasetProfile.load(BASELINE_PROFILE), profile)
+    alerts = [r for r in results if r.status != "ok"]
+    for r in alerts:
+        logger.warning(f"Data {r.status}: {r.column} {r.metric}={r.value:.4f}")
+
+    with open(report_path, "w") as f:
+        json.dump({"checked_at": datetime.now().isoformat(timespec="seconds"),
+                   "rows": profile.rows,
+                   "alerts": len(alerts),
+                   "results": [r._asdict() for r in results]}, f, indent=2)
+    logger.info(f"Drift check: {len(alerts)} alerts over {len(results)} checks, report: {report_path}")
+    return results
+
+
+def promote_baseline():
+    """Make the current batch profile the baseline (called after a model is trained on it)."""
+    if not os.path.exists(BATCH_PROFILE):
+        return None
+    shutil.copyfile(BATCH_PROFILE, BASELINE_PROFILE)
+    logger.info(f"Training baseline profile updated: {BASELINE_PROFILE}")
+    return BASELINE_PROFILE
+
+
+def load_batch_profile(data_file):
+    """Profile of the last merged batch, or None if missing or older than `data_file`."""
+    if not os.path.exists(BATCH_PROFILE):
+        return None
+    if os.path.exists(data_file) and os.path.getmtime(data_file) > os.path.getmtime(BATCH_PROFILE):
+        return None
+    return DatasetProfile.load(BATCH_PROFILE)
@@ -0,0 +1,126 @@
+"""
+Per-column data profiles built from streaming sketches.
+
+A DatasetProfile is updated chunk by chunk while data is ingested; its size does not
+depend on the number of rows, profiles of different batches can be merged, and it
+answers row/missing/distinct counts, quantiles and category frequencies without
+rescanning the data.
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.monitoring.sketches import KLLSketch, HyperLogLog, CountMinSketch
+from src.validation.rules import TELCO_SCHEMA
+
+SUMMARY_QUANTILES = [0.01, 0.25, 0.5, 0.75, 0.99]
+TOP_CATEGORIES = 10
+
+
+class ColumnProfile:
+    """Sketches of one column: KLL quantiles (numeric) or count-min (categorical) + HLL."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.count = 0
+        self.missing = 0
+        self.distinct = HyperLogLog()
+        self.quantiles = KLLSketch() if kind == "numeric" else None
+        self.frequencies = CountMinSketch() if kind == "categorical" else None
+
+    def update(self, series):
+        if self.kind == "numeric":
+            series = pd.to_numeric(series, errors="coerce")
+        present = series.dropna()
+        self.count += len(series)
+        self.missing += len(series) - len(present)
+        self.distinct.update(present)
+        if self.kind == "numeric":
+            self.quantiles.update(present.to_numpy(dtype=float))
+        else:
+            self.frequencies.update(present)
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.missing += other.missing
+        self.distinct.merge(other.distinct)
+        if self.kind == "numeric":
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.frequencies.merge(other.frequencies)
+        return self
+
+    def top_categories(self, n=TOP_CATEGORIES):
+        """Most frequent tracked values with their approximate counts."""
+        if self.frequencies is None or not self.frequencies.tracked:
+            return {}
+        values = sorted(self.frequencies.tracked)
+        counts = self.frequencies.estimate(values)
+        order = np.argsort(-counts, kind="stable")[:n]
+        return {values[i]: int(counts[i]) for i in order}
+
+    def summary(self):
+        summary = {
+            "kind": self.kind,
+            "count": self.count,
+            "missing": self.missing,
+            "distinct": self.distinct.count(),
+        }
+        if self.kind == "numeric":
+            summary["min"] = float(self.quantiles.min) if self.quantiles.n else None
+            summary["max"] = float(self.quantiles.max) if self.quantiles.n else None
+            summary["quantiles"] = {str(q): float(v) for q, v in
+                                    zip(SUMMARY_QUANTILES, self.quantiles.quantile(SUMMARY_QUANTILES))}
+        else:
+            summary["top"] = self.top_categories()
+        return summary
+
+
+def column_kind(name, series, schema=TELCO_SCHEMA):
+    """numeric | categorical, from the schema when it knows the column, else from the dtype."""
+    if name in schema:
+        return "numeric" if schema[name]["type"] == "numeric" else "categorical"
+    return "numeric" if pd.api.types.is_numeric_dtype(series) else "categorical"
+
+
+class DatasetProfile:
+    """Column profiles of a dataset (or of a stream of chunks)."""
+
+    def __init__(self, schema=TELCO_SCHEMA):
+        self.schema = schema
+        self.columns = {}
+        self.rows = 0
+
+    def update(self, chunk):
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(column_kind(col, chunk[col], self.schema))
+            self.columns[col].update(chunk[col])
+        self.rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        self.rows += other.rows
+        return self
+
+    def summary(self):
+        return {"rows": self.rows, "columns": {col: p.summary() for col, p in self.columns.items()}}
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp_path, compress=3)
+        os.replace(tmp_path, path)
+        return path
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
@@ -0,0 +1,193 @@
+"""
+Mergeable streaming sketches (constant memory, updated one chunk at a time).
+
+- KLLSketch: approximate quantiles / CDF of a numeric column
+- HyperLogLog: approximate distinct count of any column
+- CountMinSketch: approximate per-value counts of a categorical column
+
+Every sketch has update(values) taking a whole array (vectorized), merge(other)
+combining two sketches of the same parameters, and is picklable (joblib).
+"""
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values):
+    """Deterministic 64-bit hashes of an array of values (stable across processes)."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy(dtype=np.uint64)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: a stack of compactors where level h holds items of weight 2**h.
+    When a level exceeds its capacity it is sorted and every other item (random offset)
+    moves up one level, so memory stays O(k log(n/k)) with rank error about 1.7/k.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self, level):
+        items = self.levels[level]
+        leftover = np.empty(0)
+        if items.size % 2:   # an odd item stays behind with its current weight
+            idx = self._rng.integers(items.size)
+            leftover, items = items[idx:idx + 1], np.delete(items, idx)
+        items = np.sort(items)
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        self.levels[level] = leftover
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[self._rng.integers(2)::2]])
+
+    def _compress(self):
+        while True:
+            over = [h for h, items in enumerate(self.levels) if items.size > self._capacity(h)]
+            if not over:
+                return
+            self._compact(over[0])
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.n += values.size
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def cdf(self, values):
+        """Approximate fraction of items <= each of `values`."""
+        if self.n == 0:
+            return np.full(np.shape(values), np.nan)
+        items, cum = self._weighted()
+        idx = np.searchsorted(items, values, side="right")
+        return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0) / cum[-1]
+
+    def quantile(self, q):
+        """Approximate value at each quantile in `q` (0..1)."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan)
+        items, cum = self._weighted()
+        idx = np.searchsorted(cum, np.asarray(q) * cum[-1], side="left")
+        return items[np.clip(idx, 0, items.size - 1)]
+
+    def support(self):
+        """Retained items (sorted); the points where the approximate CDF changes."""
+        return np.sort(np.concatenate(self.levels))
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**p one-byte registers (std. error ~1.04/sqrt(2**p))."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update_hashes(self, hashes):
+        suffix_bits = 64 - self.p
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        # suffix < 2**52, so the float conversion is exact and frexp gives its bit length
+        suffix = (hashes & np.uint64((1 << suffix_bits) - 1)).astype(np.float64)
+        _, bit_length = np.frexp(suffix)
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        return self.update_hashes(hash_values(values)) if len(values) else self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(float))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:   # small-range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """
+    Count-min sketch of value frequencies (never under-counts; over-counts by at most
+    e/width of the total with probability 1 - exp(-depth)). Also remembers up to
+    `max_tracked` distinct values so the categories can be enumerated for drift checks.
+    """
+
+    def __init__(self, width=2048, depth=4, max_tracked=256):
+        self.width = width
+        self.depth = depth
+        self.max_tracked = max_tracked
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+        self.tracked = set()
+        self.overflow = False   # more distinct values seen than max_tracked
+
+    def _indexes(self, hashes):
+        # Kirsch-Mitzenmacher: row i uses h1 + i * h2
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = hashes >> np.uint64(32)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values):
+        values = pd.Series(values).dropna().astype(str)
+        if not len(values):
+            return self
+        for row, idx in enumerate(self._indexes(hash_values(values))):
+            self.table[row] += np.bincount(idx, minlength=self.width)
+        self.total += len(values)
+        if not self.overflow:
+            self.tracked.update(values.unique()[:self.max_tracked + 1])
+            if len(self.tracked) > self.max_tracked:
+                self.tracked, self.overflow = set(), True
+        return self
+
+    def merge(self, other):
+        self.table += other.table
+        self.total += other.total
+        self.overflow = self.overflow or other.overflow
+        self.tracked = set() if self.overflow else self.tracked | other.tracked
+        if len(self.tracked) > self.max_tracked:
+            self.tracked, self.overflow = set(), True
+        return self
+
+    def estimate(self, values):
+        """Approximate count of each of `values`."""
+        values = pd.Series(list(values), dtype=object).astype(str)
+        if not len(values):
+            return np.zeros(0, dtype=np.int64)
+        idx = self._indexes(hash_values(values))
+        return np.min(self.table[np.arange(self.depth)[:, None], idx], axis=0)
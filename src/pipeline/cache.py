@@ -0,0 +1,249 @@
+import os
+import re
+import ast
+import json
+import hashlib
+import functools
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_DIR = ".stage_cache"
+HASH_BLOCK_SIZE = 1024 * 1024
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROJECT_PACKAGES = ("src",)   # imports of these packages are part of a stage's code
+SETTING_PREFIX = "CHURN_"
+
+_SETTING_NAME = re.compile(rf"\b{SETTING_PREFIX}[A-Z0-9_]+\b")
+
+_DVC_MD5 = re.compile(r"^\s*-?\s*md5:\s*([0-9a-f]{32})", re.MULTILINE)
+_DVC_SIZE = re.compile(r"^\s*size:\s*(\d+)", re.MULTILINE)
+
+
+def _write_json_atomic(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def md5_file(path):
+    """MD5 of a file, read in blocks."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_dvc_pointer(path):
+    """(md5, size) recorded by `dvc add` in `<path>.dvc`, or None without a valid pointer."""
+    pointer = f"{path}.dvc"
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer) as f:
+        text = f.read()
+    md5, size = _DVC_MD5.search(text), _DVC_SIZE.search(text)
+    if md5 is None or size is None:
+        return None
+    return md5.group(1), int(size.group(1))
+
+
+def dvc_md5(path):
+    """
+    MD5 recorded by `dvc add` in `<path>.dvc`, if that pointer still describes the file
+    (same size and the file has not been modified after the pointer was written).
+    """
+    recorded = read_dvc_pointer(path) if os.path.exists(path) else None
+    if recorded is None:
+        return None
+    md5, size = recorded
+    if size != os.path.getsize(path):
+        return None
+    if os.path.getmtime(path) > os.path.getmtime(f"{path}.dvc"):
+        return None
+    return md5
+
+
+def file_fingerprint(path, state=None):
+    """
+    Content hash of a file (None if it does not exist).
+    Reuses the DVC pointer hash when valid, else a local (size, mtime) -> md5 cache,
+    so unchanged files are never re-read.
+    """
+    if not os.path.exists(path):
+        return None
+    if os.path.isdir(path):
+        digest = hashlib.md5()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update((file_fingerprint(file_path, state) or "").encode())
+        return digest.hexdigest()
+
+    md5 = dvc_md5(path)
+    if md5 is not None:
+        return md5
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = state.get(key) if state is not None else None
+    if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+        return entry[2]
+    md5 = md5_file(path)
+    if state is not None:
+        state[key] = [stat.st_size, stat.st_mtime_ns, md5]
+    return md5
+
+
+def module_file(module):
+    """Source file of a project module (dotted name) or None, found without importing anything."""
+    base = os.path.join(PROJECT_ROOT, *module.split("."))
+    for path in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_source(path, mtime_ns):
+    """(project imports, CHURN_* names) in one source file, including imports inside functions."""
+    with open(path) as f:
+        source = f.read()
+    package = os.path.relpath(os.path.dirname(path), PROJECT_ROOT).replace(os.sep, ".")
+    imports = set()
+    for node in ast.walk(ast.parse(source, filename=path)):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:   # relative import
+                parent = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{parent}.{base}" if base else parent
+            # `from pkg import name`: name may be a submodule or an attribute
+            imports.add(base)
+            imports.update(f"{base}.{alias.name}" for alias in node.names)
+    imports = frozenset(m for m in imports if m.split(".")[0] in PROJECT_PACKAGES)
+    return imports, frozenset(_SETTING_NAME.findall(source))
+
+
+def module_closure(modules):
+    """{module: source file} of `modules` and every project module they import, transitively."""
+    found, pending = {}, list(modules)
+    while pending:
+        module = pending.pop()
+        if module in found:
+            continue
+        path = module_file(module)
+        if path is None:
+            if module in modules:
+                raise ImportError(f"Cannot locate source of module: {module}")
+            continue   # an attribute imported with `from module import name`
+        found[module] = path
+        pending.extend(_scan_source(path, os.stat(path).st_mtime_ns)[0])
+    return dict(sorted(found.items()))
+
+
+def settings_read(modules):
+    """Names of the CHURN_* settings referenced by `modules` and the project modules they import."""
+    names = set()
+    for path in module_closure(modules).values():
+        names |= _scan_source(path, os.stat(path).st_mtime_ns)[1]
+    return sorted(names)
+
+
+def code_fingerprint(modules):
+    """Hash of the source files of `modules` (dotted names) and of every project module they import."""
+    digest = hashlib.md5()
+    for module, path in module_closure(modules).items():
+        digest.update(module.encode())
+        digest.update(md5_file(path).encode())
+    return digest.hexdigest()
+
+
+def write_run_manifest(path, outputs, **info):
+    """
+    Record the files one run of a stage produced (timestamped reports, model bundles...)
+    in a JSON manifest at a fixed `path`. When the manifest is a declared stage output,
+    the files it lists are tracked as outputs as well.
+    """
+    _write_json_atomic(path, {**info, "outputs": [p for p in outputs if p]})
+    return path
+
+
+def expand_outputs(paths):
+    """`paths` plus the files listed in any run manifest (see write_run_manifest) among them."""
+    expanded = list(paths)
+    for path in paths:
+        if path.endswith(".json"):
+            manifest = _read_json(path, None)
+            if isinstance(manifest, dict):
+                expanded.extend(manifest.get("outputs", []))
+    return expanded
+
+
+class StageCache:
+    """
+    Records, per stage, the fingerprint of its inputs + code + params and the
+    hashes of the outputs it produced. A stage is fresh (can be skipped) when the
+    fingerprint is unchanged and every recorded output still has the same content.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.state_file = os.path.join(cache_dir, "file_hashes.json")
+        self.state = _read_json(self.state_file, {})
+
+    def _manifest_path(self, stage):
+        return os.path.join(self.cache_dir, f"{stage}.json")
+
+    def fingerprint(self, inputs, modules, params):
+        payload = {
+            "inputs": {path: file_fingerprint(path, self.state) for path in sorted(inputs)},
+            "code": code_fingerprint(modules),
+            "params": params,
+        }
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        return digest, payload
+
+    def is_fresh(self, stage, fingerprint):
+        manifest = _read_json(self._manifest_path(stage), None)
+        if not manifest or manifest.get("fingerprint") != fingerprint:
+            return False
+        for path, md5 in manifest.get("outputs", {}).items():
+            if file_fingerprint(path, self.state) != md5:
+                logger.info(f"Stage {stage}: output changed or missing, re-running ({path})")
+                return False
+        return True
+
+    def record(self, stage, fingerprint, payload, outputs):
+        manifest = {
+            "fingerprint": fingerprint,
+            "inputs": payload["inputs"],
+            "code": payload["code"],
+            "params": payload["params"],
+            "outputs": {path: file_fingerprint(path, self.state) for path in expand_outputs(outputs)
+                        if os.path.exists(path)},
+        }
+        _write_json_atomic(self._manifest_path(stage), manifest)
+        self.save_state()
+
+    def invalidate(self, stage):
+        try:
+            os.remove(self._manifest_path(stage))
+        except FileNotFoundError:   # never recorded, or removed by a concurrent task
+            pass
+
+    def save_state(self):
+        _write_json_atomic(self.state_file, self.state)
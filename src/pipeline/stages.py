@@ -0,0 +1,129 @@
+"""
+Churn pipeline stages with content-hash caching.
+
+Each stage declares its input and output files. Before a stage runs, its inputs (DVC
+hashes when available), code and settings are fingerprinted; if nothing changed since
+the last successful run and its outputs are intact, the stage is skipped. The code is
+the stage function's module plus every project module it imports (found by parsing the
+sources, nothing is imported), and the settings are the CHURN_* variables that code
+reads, minus RUNTIME_SETTINGS. Stages writing timestamped files (model bundles, reports)
+declare a run manifest listing them as output (cache.write_run_manifest), so deleting
+any of those files re-runs the stage. Used by the Airflow DAG and for local runs:
+
+    python -m src.pipeline.stages              # run the whole pipeline
+    python -m src.pipeline.stages train --force
+"""
+import os
+import argparse
+import importlib
+from collections import namedtuple
+
+from src.pipeline.cache import StageCache, settings_read
+from src.storage.intermediate import data_path
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+MERGED_FILE = data_path("data/processed/merged_churn")
+CLEAN_FILE = data_path("data/processed/clean_churn")
+PREPROCESSOR_FILE = "models/preprocessor.joblib"
+TRANSFORMED_DB = "transformed_churn.db"
+FEAST_FILE = data_path("transformed_churn")
+FEATURE_EXPORT_DIR = "feature_exports"
+TUNED_PARAMS_FILE = "models/tuned_params.json"
+LATEST_MODEL_FILE = "models/latest_model.json"                  # src.modeling.artifacts
+VALIDATION_LATEST_FILE = "reports/data_quality_latest.json"     # src.validation.validate (LATEST_REPORT_FILE)
+
+# Settings that do not change what a stage produces (how it runs, or where caches live)
+RUNTIME_SETTINGS = {"CHURN_FORCE_STAGES", "CHURN_PROFILE", "CHURN_PLOT_MODE",
+                    "CHURN_TRAIN_WORKERS", "CHURN_CV_CACHE_DIR", "CHURN_CV_CACHE_ENTRIES"}
+
+# Re-run every stage regardless of the cache
+FORCE = os.environ.get("CHURN_FORCE_STAGES", "0") == "1"
+
+Stage = namedtuple("Stage", ["name", "func", "inputs", "outputs", "always_run"])
+
+STAGES = [
+    # Ingestion reads live sources, so it always runs (the DAG runs it once per source,
+    # with stage_kwargs={"names": [source]}); downstream stages are keyed on the content
+    # of the merged file.
+    Stage("ingest", "src.ingestion.async_ingest:ingest_sources",
+          inputs=[], outputs=[], always_run=True),
+    Stage("merge", "src.ingestion.ingest:merge_raw_files",
+          inputs=[], outputs=[MERGED_FILE], always_run=True),
+    Stage("version", "src.ingestion.ingest:run_dvc_versioning",
+          inputs=[MERGED_FILE], outputs=[], always_run=True),
+    Stage("validate", "src.validation.validate:validate",
+          inputs=[MERGED_FILE], outputs=[VALIDATION_LATEST_FILE], always_run=False),
+    Stage("preprocess", "src.preprocessing.preprocess:preprocess",
+          inputs=[MERGED_FILE], outputs=[CLEAN_FILE, PREPROCESSOR_FILE], always_run=False),
+    Stage("feature_engineering", "src.feature_engineering.features:feature_engineering",
+          inputs=[CLEAN_FILE, PREPROCESSOR_FILE], outputs=[TRANSFORMED_DB], always_run=False),
+    Stage("export", "src.feature_store.export:export_to_feast_csv",
+          inputs=[TRANSFORMED_DB], outputs=[FEAST_FILE, FEATURE_EXPORT_DIR], always_run=False),
+    Stage("train", "src.modeling.train:train_and_evaluate",
+          inputs=[CLEAN_FILE, TUNED_PARAMS_FILE], outputs=[LATEST_MODEL_FILE], always_run=False),
+]
+STAGE_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def _resolve(func_path):
+    """Import "package.module:function" only when the stage actually runs."""
+    module_name, func_name = func_path.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def stage_modules(stage):
+    """Module of the stage function; the cache adds every project module it imports."""
+    return [stage.func.split(":")[0]]
+
+
+def stage_params(stage, stage_kwargs=None):
+    """Settings that change a stage's result: the CHURN_* variables its code reads + call arguments."""
+    names = [n for n in settings_read(stage_modules(stage)) if n not in RUNTIME_SETTINGS]
+    settings = {n: os.environ[n] for n in names if n in os.environ}
+    return {"env": settings, "kwargs": stage_kwargs or {}}
+
+
+def run_stage(name, force=False, stage_kwargs=None):
+    """
+    Run one pipeline stage unless its cached result is still valid.
+    Returns the stage's return value, or None when it was skipped.
+    """
+    stage = STAGE_BY_NAME[name]
+    cache = StageCache()
+    fingerprint, payload = cache.fingerprint(stage.inputs, stage_modules(stage), stage_params(stage, stage_kwargs))
+
+    if not (force or FORCE or stage.always_run) and cache.is_fresh(name, fingerprint):
+        cache.save_state()
+        logger.info(f"Stage {name} is up to date (fingerprint {fingerprint[:12]}), skipped")
+        print(f"⏭ Stage {name} is up to date, skipped.")
+        return None
+
+    logger.info(f"Running stage {name} (fingerprint {fingerprint[:12]})")
+    cache.invalidate(name)
+    result = _resolve(stage.func)(**(stage_kwargs or {}))
+    cache.record(name, fingerprint, payload, stage.outputs)
+    return result
+
+
+def run_pipeline(stages=None, force=False):
+    """Run the given stages (default: all) in pipeline order, skipping up-to-date ones."""
+    for stage in STAGES:
+        if stages is None or stage.name in stages:
+            run_stage(stage.name, force=force)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run churn pipeline stages with caching")
+    parser.add_argument("stages", nargs="*", help=f"Stages to run (default: all): {list(STAGE_BY_NAME)}")
+    parser.add_argument("--force", action="store_true", help="Ignore cached results")
+    args = parser.parse_args()
+    unknown = [s for s in args.stages if s not in STAGE_BY_NAME]
+    if unknown:
+        parser.error(f"Unknown stages: {unknown}")
+    run_pipeline(args.stages or None, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
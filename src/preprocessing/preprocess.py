@@ -1,42 +1,250 @@
 import os
-import logging
+import joblib
+import numpy as np
 import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-logging.basicConfig(filename="ingestion.log", level=logging.INFO)
+from src.storage.intermediate import data_path, read_frame, FrameWriter
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_rows, record_files
 
-MERGED_FILE = "data/processed/merged_churn.csv"
-CLEAN_FILE = "data/processed/clean_churn.csv"
+logger = get_logger(__name__)
 
-def preprocess():
+MERGED_FILE = data_path("data/processed/merged_churn")
+CLEAN_FILE = data_path("data/processed/clean_churn")
+PREPROCESSOR_FILE = "models/preprocessor.joblib"
+
+ID_COLUMNS = ["customerID"]                               # kept as keys, never used as features
+TARGET = "Churn"
+NUMERIC_COLUMNS = ["tenure", "MonthlyCharges", "TotalCharges"]  # coerced to numbers ("" -> NaN)
+MAX_CATEGORIES = 20      # per categorical column, rarer values go to one "infrequent" column
+MIN_FREQUENCY = 0.005    # categories seen in fewer rows than this share are infrequent
+CHUNK_SIZE = 50_000      # rows densified at a time when writing CLEAN_FILE
+
+
+def encode_target(y):
+    """Map the churn label to 0/1 (accepts Yes/No, True/False or numbers)."""
+    if pd.api.types.is_numeric_dtype(y):
+        return y.fillna(0).astype("int8")
+    labels = y.astype("string").str.strip().str.lower()
+    return labels.isin(["yes", "true", "1"]).astype("int8")
+
+
+class ChurnPreprocessor(BaseEstimator, TransformerMixin):
     """
-    Preprocess the merged churn CSV:
-    - Impute missing numeric & categorical values
-    - One-hot encode categorical columns
-    - Standardize numeric columns
-    - Save cleaned CSV for downstream tasks
+    Fitted, reusable preprocessing for raw churn rows.
+    - drops ID and target columns
+    - coerces known numeric columns stored as text (e.g. TotalCharges)
+    - numeric: mean imputation + standard scaling
+    - categorical: most-frequent imputation + one-hot with capped cardinality
+    - transform() returns a sparse CSR matrix (float32)
+
+    Fit once on training data, save() it, and load() it at inference time.
     """
-    if not os.path.exists(MERGED_FILE):
-        raise FileNotFoundError(f"Merged CSV not found: {MERGED_FILE}")
 
-    df = pd.read_csv(MERGED_FILE)
+    def __init__(self, id_columns=tuple(ID_COLUMNS), target=TARGET,
+                 numeric_columns=tuple(NUMERIC_COLUMNS),
+                 max_categories=MAX_CATEGORIES, min_frequency=MIN_FREQUENCY):
+        self.id_columns = id_columns
+        self.target = target
+        self.numeric_columns = numeric_columns
+        self.max_categories = max_categories
+        self.min_frequency = min_frequency
+
+    def _prepare(self, df):
+        X = df.drop(columns=[c for c in [*self.id_columns, self.target] if c in df.columns])
+        for col in self.numeric_columns:
+            if col in X.columns:
+                X[col] = pd.to_numeric(X[col], errors="coerce")
+        return X
+
+    @staticmethod
+    def _as_categories(X, cols):
+        # Uniform str values with np.nan for missing, as expected by SimpleImputer/OneHotEncoder
+        X = X.copy()
+        for col in cols:
+            values = X[col]
+            X[col] = values.astype(object).where(values.notna(), np.nan).map(str, na_action="ignore")
+        return X
+
+    def fit(self, df, y=None):
+        X = self._prepare(df)
+        self.numeric_features_ = list(X.select_dtypes(include="number").columns)
+        self.categorical_features_ = [c for c in X.columns if c not in self.numeric_features_]
+
+        numeric = Pipeline([
+            ("impute", SimpleImputer(strategy="mean")),
+            ("scale", StandardScaler()),
+        ])
+        categorical = Pipeline([
+            ("impute", SimpleImputer(strategy="most_frequent")),
+            ("onehot", OneHotEncoder(
+                handle_unknown="infrequent_if_exist",
+                max_categories=self.max_categories,
+                min_frequency=self.min_frequency,
+                sparse_output=True,
+                dtype=np.float32,
+            )),
+        ])
+        self.transformer_ = ColumnTransformer(
+            [("num", numeric, self.numeric_features_),
+             ("cat", categorical, self.categorical_features_)],
+            sparse_threshold=1.0,
+            verbose_feature_names_out=False,
+        )
+        self.transformer_.fit(self._as_categories(X, self.categorical_features_))
+        return self
+
+    def transform(self, df):
+        X = self._prepare(df)
+        X = X.reindex(columns=self.numeric_features_ + self.categorical_features_)
+        X = self._as_categories(X, self.categorical_features_)
+        return self.transformer_.transform(X).tocsr().astype(np.float32)
+
+    def get_feature_names_out(self, input_features=None):
+        return self.transformer_.get_feature_names_out()
+
+    def numeric_scaling(self):
+        """{column: (mean, scale)} of the standardized numeric columns: original = value * scale + mean."""
+        scaler = self.transformer_.named_transformers_["num"].named_steps["scale"]
+        means = scaler.mean_ if scaler.with_mean else np.zeros(len(self.numeric_features_))
+        scales = scaler.scale_ if scaler.with_std else np.ones(len(self.numeric_features_))
+        return {c: (float(m), float(s)) for c, m, s in zip(self.numeric_features_, means, scales)}
+
+    def save(self, path=PREPROCESSOR_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path=PREPROCESSOR_FILE):
+        return joblib.load(path)
+
+
+def _to_float(value):
+    """pd.to_numeric(errors="coerce") for one value."""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class RecordEncoder:
+    """
+    Fast path of ChurnPreprocessor.transform() for a few rows given as dicts (online scoring).
+    The fitted imputers, scaler and one-hot encoder are reduced to plain vectors and
+    category -> output column maps, so encoding a row is a handful of dict lookups
+    instead of a pandas ColumnTransformer pass. Output matches transform() (dense float32).
+    """
+
+    def __init__(self, preprocessor):
+        numeric = preprocessor.transformer_.named_transformers_["num"]
+        categorical = preprocessor.transformer_.named_transformers_["cat"]
+        self.numeric_features = list(preprocessor.numeric_features_)
+        self.categorical_features = list(preprocessor.categorical_features_)
+        self.n_features = len(preprocessor.get_feature_names_out())
+
+        scaler = numeric.named_steps["scale"]
+        self.numeric_fill = numeric.named_steps["impute"].statistics_.astype(np.float64)
+        self.numeric_mean = scaler.mean_ if scaler.with_mean else np.zeros(len(self.numeric_features))
+        self.numeric_scale = scaler.scale_ if scaler.with_std else np.ones(len(self.numeric_features))
+
+        self.categorical_fill = [str(v) for v in categorical.named_steps["impute"].statistics_]
+        self.category_index, self.unknown_index = self._category_maps(categorical.named_steps["onehot"])
+
+    def _category_maps(self, encoder):
+        """Output column of every known category (and of unknown values, or None) per categorical column."""
+        offset = len(self.numeric_features)
+        if not self.categorical_features:
+            return [], []
+        # One probe row per category: every known category sets exactly one output column
+        # per input column, and output blocks follow the input column order.
+        depth = max(len(c) for c in encoder.categories_)
+        probe = np.array([[cats[min(i, len(cats) - 1)] for cats in encoder.categories_]
+                          for i in range(depth)], dtype=object)
+        hot = encoder.transform(probe).tocsr()
+        index_maps = [{} for _ in self.categorical_features]
+        for i in range(depth):
+            columns = np.sort(hot.indices[hot.indptr[i]:hot.indptr[i + 1]])
+            for j, cats in enumerate(encoder.categories_):
+                if i < len(cats):
+                    index_maps[j][str(cats[i])] = offset + int(columns[j])
+
+        unknown = []
+        for j, infrequent in enumerate(encoder.infrequent_categories_):
+            # handle_unknown="infrequent_if_exist": unknown values go to the infrequent column, if any
+            unknown.append(index_maps[j][str(infrequent[0])] if infrequent is not None else None)
+        return index_maps, unknown
+
+    def missing_columns(self, record):
+        """Input columns the model needs that are absent from `record` (a dict)."""
+        return [c for c in self.numeric_features + self.categorical_features if c not in record]
+
+    def transform(self, records):
+        """Dense float32 feature matrix of a list of row dicts (absent or null values are imputed)."""
+        X = np.zeros((len(records), self.n_features), dtype=np.float32)
+        n_numeric = len(self.numeric_features)
+        numbers = np.array([[_to_float(r.get(c)) for c in self.numeric_features] for r in records],
+                           dtype=np.float64).reshape(len(records), n_numeric)
+        numbers = np.where(np.isnan(numbers), self.numeric_fill, numbers)
+        X[:, :n_numeric] = (numbers - self.numeric_mean) / self.numeric_scale
+        for i, record in enumerate(records):
+            for j, col in enumerate(self.categorical_features):
+                value = record.get(col)
+                key = self.categorical_fill[j] if value is None or value != value else str(value)
+                column = self.category_index[j].get(key, self.unknown_index[j])
+                if column is not None:
+                    X[i, column] = 1.0
+        return X
+
+
+@instrumented("preprocess")
+def preprocess(refit=True):
+    """
+    Preprocess the merged churn data:
+    - Fit ChurnPreprocessor (or reuse the saved one with refit=False)
+    - Impute, scale and one-hot encode (sparse, bounded width)
+    - Save the fitted preprocessor for inference (PREPROCESSOR_FILE)
+    - Save cleaned data (columnar, compressed) for downstream tasks,
+      with customerID and the 0/1 Churn label kept alongside the features
+    """
+    if not os.path.exists(MERGED_FILE):
+        raise FileNotFoundError(f"Merged data not found: {MERGED_FILE}")
 
-    # Separate numeric & categorical
-    num_cols = df.select_dtypes(include=['float64', 'int64']).columns
-    cat_cols = df.select_dtypes(exclude=['float64', 'int64']).columns
+    df = read_frame(MERGED_FILE)
 
-    # Impute missing values
-    df[num_cols] = SimpleImputer(strategy='mean').fit_transform(df[num_cols])
-    df[cat_cols] = SimpleImputer(strategy='most_frequent').fit_transform(df[cat_cols])
+    if refit or not os.path.exists(PREPROCESSOR_FILE):
+        preprocessor = ChurnPreprocessor().fit(df)
+        preprocessor.save(PREPROCESSOR_FILE)
+        logger.info(f"Fitted preprocessor saved at {PREPROCESSOR_FILE}")
+    else:
+        preprocessor = ChurnPreprocessor.load(PREPROCESSOR_FILE)
 
-    # One-hot encode categorical columns
-    df = pd.get_dummies(df, columns=cat_cols, drop_first=True)
+    X = preprocessor.transform(df)
+    feature_names = list(preprocessor.get_feature_names_out())
+    keys = df[[c for c in ID_COLUMNS if c in df.columns]].reset_index(drop=True)
+    labels = encode_target(df[TARGET]).reset_index(drop=True) if TARGET in df.columns else None
 
-    # Standardize numeric columns
-    df[num_cols] = StandardScaler().fit_transform(df[num_cols])
+    # Save cleaned data, densified one chunk at a time
+    with FrameWriter(CLEAN_FILE) as writer:
+        for start in range(0, X.shape[0], CHUNK_SIZE):
+            stop = start + CHUNK_SIZE
+            chunk = pd.DataFrame(X[start:stop].toarray(), columns=feature_names)
+            chunk = pd.concat([keys.iloc[start:stop].reset_index(drop=True), chunk], axis=1)
+            if labels is not None:
+                chunk[TARGET] = labels.iloc[start:stop].to_numpy()
+            writer.write(chunk)
 
-    # Save cleaned CSV
-    os.makedirs(os.path.dirname(CLEAN_FILE), exist_ok=True)
-    df.to_csv(CLEAN_FILE, index=False)
-    logging.info(f"Preprocessing complete. Cleaned CSV saved at {CLEAN_FILE}")
+    record_rows(rows_in=len(df), rows_out=writer.rows)
+    record_files(read=[MERGED_FILE], written=[CLEAN_FILE, PREPROCESSOR_FILE])
+    logger.info(
+        f"Preprocessing complete. {X.shape[1]} features "
+        f"({X.nnz / max(X.shape[0] * X.shape[1], 1):.1%} non-zero). Cleaned data saved at {CLEAN_FILE}"
+    )
+    return CLEAN_FILE
@@ -0,0 +1,189 @@
+"""
+Batch scoring of customers with the saved churn model.
+
+    python -m src.scoring.score --input new_customers.csv --output scores.parquet
+
+Rows are streamed through the fitted preprocessor and the model in chunks,
+so memory is bounded by --chunksize, not by the input size.
+"""
+import os
+import glob
+import time
+import argparse
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.preprocessing.preprocess import ChurnPreprocessor, RecordEncoder, PREPROCESSOR_FILE, ID_COLUMNS
+from src.modeling.artifacts import (
+    MANIFEST_FILE, TreeEnsembleModel, NativeBoosterModel, is_bundle, load_bundle
+)
+from src.storage.intermediate import iter_frames, FrameWriter
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+MODEL_DIR = "models"
+CHUNK_SIZE = 50_000
+THRESHOLD = 0.5
+
+
+class LatencyTracker:
+    """Thread-safe record of call latencies and row counts (p50/p99 latency, rows/sec)."""
+
+    def __init__(self, max_samples=100_000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._rows = 0
+        self._busy_seconds = 0.0
+
+    def record(self, seconds, rows):
+        with self._lock:
+            if len(self._latencies) >= self.max_samples:  # keep a sliding window
+                self._latencies = self._latencies[self.max_samples // 2:]
+            self._latencies.append(seconds)
+            self._rows += rows
+            self._busy_seconds += seconds
+
+    def summary(self):
+        with self._lock:
+            latencies = np.asarray(self._latencies, dtype=float)
+            rows, busy = self._rows, self._busy_seconds
+        if latencies.size == 0:
+            return {"calls": 0, "rows": 0, "p50_ms": None, "p99_ms": None, "rows_per_sec": None}
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        return {
+            "calls": int(latencies.size),
+            "rows": rows,
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "rows_per_sec": round(rows / busy, 1) if busy > 0 else None,
+        }
+
+
+def latest_model_path(model_dir=MODEL_DIR):
+    """
+    Most recently saved model bundle (models/bundles/*). `*_churn_model.pkl` files of
+    older runs were trained on another feature layout, so they are only used (with a
+    warning) when there is no bundle at all.
+    """
+    candidates = [os.path.dirname(p) for p in glob.glob(os.path.join(model_dir, "bundles", "*", MANIFEST_FILE))]
+    if not candidates:
+        candidates = glob.glob(os.path.join(model_dir, "*_churn_model.pkl"))
+        if candidates:
+            logger.warning(f"No model bundle in {model_dir}, falling back to a legacy pickle; "
+                           f"it may not match the current preprocessor's features")
+    if not candidates:
+        raise FileNotFoundError(f"No trained model found in {model_dir}")
+    return max(candidates, key=os.path.getmtime)
+
+
+class ChurnScorer:
+    """Fitted preprocessor + model, applied to raw customer rows in vectorized batches."""
+
+    def __init__(self, model_path=None, preprocessor_path=PREPROCESSOR_FILE, threshold=THRESHOLD):
+        self.model_path = model_path or latest_model_path()
+        if is_bundle(self.model_path):
+            # the bundle carries the preprocessor it was trained with
+            self.model, preprocessor, manifest = load_bundle(self.model_path)
+            self.preprocessor = preprocessor or ChurnPreprocessor.load(preprocessor_path)
+            expected = manifest.get("feature_names")
+        else:
+            self.model = joblib.load(self.model_path)
+            self.preprocessor = ChurnPreprocessor.load(preprocessor_path)
+            expected = None
+        self.feature_names = list(self.preprocessor.get_feature_names_out())
+        if expected is not None and expected != self.feature_names:
+            raise ValueError(f"Preprocessor features do not match the features of model {self.model_path}")
+        self.encoder = RecordEncoder(self.preprocessor)
+        self.threshold = threshold
+        self.latency = LatencyTracker()
+        logger.info(f"Loaded model {self.model_path}")
+
+    def _model_proba(self, X):
+        # sklearn models were fitted on the dense, named feature frame written by preprocess();
+        # native bundle models take the array as is
+        if not isinstance(self.model, (TreeEnsembleModel, NativeBoosterModel)):
+            X = pd.DataFrame(X, columns=self.feature_names)
+        return self.model.predict_proba(X)[:, 1]
+
+    def predict_proba(self, df):
+        """Churn probability for every row of a raw customer DataFrame."""
+        start = time.perf_counter()
+        X = self.preprocessor.transform(df).toarray()
+        proba = self._model_proba(X)
+        self.latency.record(time.perf_counter() - start, len(df))
+        return proba
+
+    def check_records(self, records):
+        """Raise ValueError unless every record is a dict with all model input columns."""
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                raise ValueError(f"Row {i} is not an object: {record!r:.80}")
+            missing = self.encoder.missing_columns(record)
+            if missing:
+                raise ValueError(f"Row {i} is missing columns: {missing}")
+
+    def score_records(self, records):
+        """
+        Score a few customers given as dicts (online path, see RecordEncoder).
+        Returns one dict per record: ID columns present in it, churn probability and prediction.
+        """
+        start = time.perf_counter()
+        proba = self._model_proba(self.encoder.transform(records))
+        self.latency.record(time.perf_counter() - start, len(records))
+        return [
+            {**{c: r[c] for c in ID_COLUMNS if c in r},
+             "churn_probability": float(np.float32(p)),
+             "churn_prediction": int(p > self.threshold)}
+            for r, p in zip(records, proba)
+        ]
+
+    def score_frame(self, df):
+        """Return customer keys with churn probability and 0/1 prediction."""
+        proba = self.predict_proba(df)
+        out = df[[c for c in ID_COLUMNS if c in df.columns]].reset_index(drop=True)
+        out["churn_probability"] = proba.astype("float32")
+        out["churn_prediction"] = (proba > self.threshold).astype("int8")   # strict, as model.predict
+        return out
+
+
+def score_file(input_path, output_path, chunksize=CHUNK_SIZE, model_path=None,
+               preprocessor_path=PREPROCESSOR_FILE):
+    """
+    Score a customer file (csv/parquet/feather) chunk by chunk into `output_path`.
+    Returns the latency / throughput summary.
+    """
+    scorer = ChurnScorer(model_path=model_path, preprocessor_path=preprocessor_path)
+    start = time.perf_counter()
+    with FrameWriter(output_path) as writer:
+        for chunk in iter_frames(input_path, chunksize=chunksize):
+            writer.write(scorer.score_frame(chunk))
+    elapsed = time.perf_counter() - start
+
+    summary = scorer.latency.summary()
+    summary["wall_seconds"] = round(elapsed, 3)
+    summary["end_to_end_rows_per_sec"] = round(writer.rows / elapsed, 1) if elapsed > 0 else None
+    logger.info(f"Scored {writer.rows} rows from {input_path} into {output_path}: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score customers with the saved churn model")
+    parser.add_argument("--input", required=True, help="Customer file (.csv/.parquet/.feather)")
+    parser.add_argument("--output", required=True, help="Scores file (.csv/.parquet/.feather)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--model", default=None,
+                        help="Model bundle directory or pickle (default: latest in models/)")
+    parser.add_argument("--preprocessor", default=PREPROCESSOR_FILE)
+    args = parser.parse_args()
+
+    summary = score_file(args.input, args.output, args.chunksize, args.model, args.preprocessor)
+    print(f"✅ Scoring complete: {summary}")
+
+
+if __name__ == "__main__":
+    main()
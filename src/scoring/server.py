@@ -0,0 +1,187 @@
+"""
+Local HTTP endpoint for online churn scoring.
+
+    python -m src.scoring.server --port 8000
+
+POST /score   {"customerID": ..., "gender": ..., ...}  or  {"rows": [{...}, ...]}
+GET  /metrics latency (p50/p99) and throughput of requests and model batches
+GET  /health
+
+Concurrent requests are micro-batched: a single worker thread collects the rows
+waiting in the queue (up to --max-batch rows or --max-wait-ms) and scores them with
+one vectorized model call. Rows must be JSON objects holding every model input column
+(null values are imputed); they are validated before queueing and encoded one dict
+at a time (ChurnScorer.score_records), so one request cannot shift another's columns.
+"""
+import json
+import time
+import queue
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.preprocessing.preprocess import PREPROCESSOR_FILE
+from src.scoring.score import ChurnScorer, LatencyTracker
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+MAX_BATCH_ROWS = 256
+MAX_WAIT_MS = 2.0
+REQUEST_TIMEOUT = 5.0
+
+
+class _PendingRequest:
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Collect rows from concurrent callers and score them together."""
+
+    def __init__(self, scorer, max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.scorer = scorer
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows, timeout=REQUEST_TIMEOUT):
+        """
+        Score a list of row dicts (checked with ChurnScorer.check_records);
+        blocks until the batch containing them is done.
+        """
+        pending = _PendingRequest(rows)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Scoring request timed out")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        n_rows = len(batch[0].rows)
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            n_rows += len(pending.rows)
+        return batch
+
+    def _score(self, batch):
+        scores = self.scorer.score_records([row for pending in batch for row in pending.rows])
+        offset = 0
+        for pending in batch:
+            pending.result = scores[offset:offset + len(pending.rows)]
+            offset += len(pending.rows)
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._score(batch)
+            except Exception as e:
+                logger.error(f"Scoring batch of {len(batch)} requests failed: {str(e)}")
+                # rescore request by request, so only the failing request gets the error
+                for pending in batch:
+                    try:
+                        self._score([pending])
+                    except Exception as request_error:
+                        pending.error = request_error
+            for pending in batch:
+                pending.done.set()
+
+
+def make_handler(batcher, request_latency):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "model": batcher.scorer.model_path})
+            elif self.path == "/metrics":
+                self._send_json(200, {
+                    "requests": request_latency.summary(),
+                    "model_batches": batcher.scorer.latency.summary(),
+                })
+            else:
+                self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._send_json(404, {"error": f"Unknown path: {self.path}"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if isinstance(payload, list):
+                    rows = payload
+                elif isinstance(payload, dict) and "rows" in payload:
+                    rows = payload["rows"]
+                else:
+                    rows = [payload]
+                if not isinstance(rows, list) or not rows:
+                    raise ValueError("Expected a row object or a non-empty list of row objects")
+                batcher.scorer.check_records(rows)
+                scores = batcher.submit(rows)
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+                return
+            request_latency.record(time.perf_counter() - start, len(rows))
+            self._send_json(200, {"scores": scores})
+
+        def log_message(self, format, *args):  # keep per-request logging off the hot path
+            pass
+
+    return ScoringHandler
+
+
+def serve(host="127.0.0.1", port=8000, model_path=None, preprocessor_path=PREPROCESSOR_FILE,
+          max_batch_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+    scorer = ChurnScorer(model_path=model_path, preprocessor_path=preprocessor_path)
+    batcher = MicroBatcher(scorer, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, LatencyTracker()))
+    logger.info(f"Scoring server listening on http://{host}:{port}")
+    print(f"✅ Scoring server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve churn scores over HTTP with micro-batching")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=None,
+                        help="Model bundle directory or pickle (default: latest in models/)")
+    parser.add_argument("--preprocessor", default=PREPROCESSOR_FILE)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.model, args.preprocessor, args.max_batch, args.max_wait_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import os
+import importlib.util
+
+# pandas / pyarrow are imported inside the functions that use them: this module is
+# imported by src.pipeline.stages, which the Airflow scheduler loads on every DAG parse.
+from src.instrumentation.logs import get_logger
+
+logger = get_logger(__name__)
+
+
+def _default_format():
+    """parquet when pyarrow is installed (checked without importing it), else csv."""
+    if importlib.util.find_spec("pyarrow") is not None:
+        return "parquet"
+    logger.warning("pyarrow is not installed: storing intermediates as csv "
+                   "(pip install pyarrow for parquet/feather, or set CHURN_STORAGE_FORMAT=csv)")
+    return "csv"
+
+
+# Format used for every file handed from one pipeline stage to the next.
+# parquet (default) and feather are typed, compressed and columnar and need pyarrow;
+# csv is kept for compatibility and is the fallback when pyarrow is missing.
+STORAGE_FORMAT = (os.environ.get("CHURN_STORAGE_FORMAT") or _default_format()).lower()
+# Also write a .csv copy next to every intermediate (for humans / legacy tools)
+EXPORT_CSV = os.environ.get("CHURN_EXPORT_CSV", "0") == "1"
+
+EXTENSIONS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "csv": ".csv",
+}
+COMPRESSION = {
+    "parquet": "zstd",
+    "feather": "zstd",
+}
+CHUNK_SIZE = 100_000
+
+
+def data_path(base, fmt=None):
+    """Return `base` (a path without extension) with the extension of the storage format."""
+    fmt = (fmt or STORAGE_FORMAT).lower()
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unsupported storage format: {fmt} (expected one of {list(EXTENSIONS)})")
+    return base + EXTENSIONS[fmt]
+
+
+def detect_format(path):
+    """Infer the storage format from a file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in EXTENSIONS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Cannot infer storage format of: {path}")
+
+
+def is_data_file(path):
+    """True if `path` has the extension of any supported storage format."""
+    return os.path.splitext(path)[1].lower() in EXTENSIONS.values()
+
+
+def _csv_copy_path(path):
+    return os.path.splitext(path)[0] + EXTENSIONS["csv"]
+
+
+def _normalize_mixed_columns(df):
+    """Cast object columns holding mixed Python types (e.g. str + float) to strings for Arrow."""
+    import pandas as pd
+    mixed = [
+        col for col in df.select_dtypes(include="object").columns
+        if pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed")
+    ]
+    if mixed:
+        df = df.copy()
+        df[mixed] = df[mixed].astype("string")
+    return df
+
+
+def write_frame(df, path, export_csv=None):
+    """
+    Write a DataFrame in the format given by the extension of `path`.
+    Optionally writes a CSV copy alongside it.
+    """
+    fmt = detect_format(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if fmt != "csv":
+        df = _normalize_mixed_columns(df)
+
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression=COMPRESSION["parquet"])
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(path, compression=COMPRESSION["feather"])
+    else:
+        df.to_csv(path, index=False)
+
+    if (EXPORT_CSV if export_csv is None else export_csv) and fmt != "csv":
+        df.to_csv(_csv_copy_path(path), index=False)
+    logger.info(f"Wrote {len(df)} rows to {path}")
+    return path
+
+
+def read_frame(path, columns=None, memory_map=True):
+    """
+    Read a DataFrame written by write_frame / FrameWriter.
+    - columns: only these columns are read (projection is pushed down for parquet/feather)
+    - memory_map: map parquet/feather files instead of copying them into memory first
+    """
+    fmt = detect_format(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found: {path}")
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+    if fmt == "feather":
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+    import pandas as pd
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_frames(path, columns=None, chunksize=CHUNK_SIZE):
+    """Yield a data file as DataFrame chunks of at most `chunksize` rows."""
+    fmt = detect_format(path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found: {path}")
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == "feather":
+        import pyarrow.feather as feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+class FrameWriter:
+    """
+    Append DataFrame chunks to one data file without holding them all in memory.
+    The schema of the first chunk is used for the whole file, so every chunk
+    must have the same columns and dtypes. `columns` is the header written
+    when no chunk arrives at all.
+
+        with FrameWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path, columns=None, export_csv=None):
+        self.path = path
+        self.columns = columns
+        self.fmt = detect_format(path)
+        self.export_csv = (EXPORT_CSV if export_csv is None else export_csv) and self.fmt != "csv"
+        self.rows = 0
+        self._tmp_path = f"{path}.tmp"
+        self._writer = None
+        self._schema = None
+        self._columns = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return self
+
+    def write(self, chunk):
+        first = self.rows == 0 and self._columns is None
+        if first:
+            self._columns = list(chunk.columns)
+
+        if self.fmt == "csv":
+            chunk.to_csv(self._tmp_path, mode="w" if first else "a", header=first, index=False)
+        else:
+            import pyarrow as pa
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = self._open_arrow_writer(self._schema)
+            self._writer.write_table(table)
+
+        if self.export_csv:
+            chunk.to_csv(_csv_copy_path(self.path), mode="w" if first else "a", header=first, index=False)
+        self.rows += len(chunk)
+
+    def _open_arrow_writer(self, schema):
+        if self.fmt == "parquet":
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self._tmp_path, schema, compression=COMPRESSION["parquet"])
+        import pyarrow as pa
+        options = pa.ipc.IpcWriteOptions(compression=COMPRESSION["feather"])
+        return pa.ipc.new_file(self._tmp_path, schema, options=options)
+
+    def close(self):
+        """Finalize the file and move it into place."""
+        if self._columns is None:
+            import pandas as pd
+            self.write(pd.DataFrame(columns=self.columns or []))
+        if self._writer is not None:
+            self._writer.close()
+        os.replace(self._tmp_path, self.path)
+        logger.info(f"Wrote {self.rows} rows to {self.path}")
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+        return False
@@ -0,0 +1,220 @@
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from src.storage.intermediate import iter_frames, read_frame, CHUNK_SIZE
+
+# One failed rule: same shape as the rows of the PDF data quality report
+RuleResult = namedtuple("RuleResult", ["file", "column", "issue_type", "count"])
+
+# Declarative schema of the merged churn data.
+#   type:    "numeric" | "category" | "string"
+#   min/max: allowed numeric range
+#   allowed: allowed category values
+#   unique:  values must not repeat
+#   zscore:  flag values with |z| above this threshold as outliers
+#   coerce:  numeric column that may be stored as text (unparseable values are type errors)
+YES_NO = ["Yes", "No"]
+TELCO_SCHEMA = {
+    "customerID": {"type": "string", "unique": True},
+    "gender": {"type": "category", "allowed": ["Female", "Male"]},
+    "SeniorCitizen": {"type": "numeric", "min": 0, "max": 1},
+    "Partner": {"type": "category", "allowed": YES_NO},
+    "Dependents": {"type": "category", "allowed": YES_NO},
+    "tenure": {"type": "numeric", "min": 0, "zscore": 3},
+    "PhoneService": {"type": "category", "allowed": YES_NO},
+    "MultipleLines": {"type": "category", "allowed": YES_NO + ["No phone service"]},
+    "InternetService": {"type": "category", "allowed": ["DSL", "Fiber optic", "No"]},
+    "OnlineSecurity": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "OnlineBackup": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "DeviceProtection": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "TechSupport": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "StreamingTV": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "StreamingMovies": {"type": "category", "allowed": YES_NO + ["No internet service"]},
+    "Contract": {"type": "category", "allowed": ["Month-to-month", "One year", "Two year"]},
+    "PaperlessBilling": {"type": "category", "allowed": YES_NO},
+    "PaymentMethod": {"type": "category", "allowed": [
+        "Electronic check", "Mailed check",
+        "Bank transfer (automatic)", "Credit card (automatic)"]},
+    "MonthlyCharges": {"type": "numeric", "min": 0, "zscore": 3},
+    "TotalCharges": {"type": "numeric", "min": 0, "zscore": 3, "coerce": True},
+    "Churn": {"type": "category", "allowed": YES_NO},
+}
+# Rules for columns that are not in the schema (e.g. extra API fields), by inferred type
+DEFAULT_NUMERIC_RULE = {"type": "numeric", "min": 0, "zscore": 3}
+DEFAULT_TEXT_RULE = {"type": "string"}
+
+IN_MEMORY_LIMIT_BYTES = 256 * 1024 ** 2  # larger files are validated chunk by chunk
+
+
+class _Accumulator:
+    """Per-rule counters that are updated chunk by chunk with vectorized operations."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.columns = list(rules)
+        self.numeric = [c for c, r in rules.items() if r["type"] == "numeric"]
+        self.categorical = [c for c, r in rules.items() if "allowed" in r]
+        self.unique = [c for c, r in rules.items() if r.get("unique")]
+        self.zscore_columns = [c for c in self.numeric if "zscore" in rules[c]]
+
+        n = len(self.numeric)
+        self.lower = np.array([rules[c].get("min", -np.inf) for c in self.numeric], dtype=float)
+        self.upper = np.array([rules[c].get("max", np.inf) for c in self.numeric], dtype=float)
+        self.rows = 0
+        self.missing = pd.Series(0, index=self.columns, dtype="int64")
+        self.count = np.zeros(n)
+        self.total = np.zeros(n)
+        self.total_sq = np.zeros(n)
+        self.below = np.zeros(n, dtype="int64")
+        self.above = np.zeros(n, dtype="int64")
+        self.bad_type = np.zeros(n, dtype="int64")
+        self.not_allowed = {c: 0 for c in self.categorical}
+        self.key_hashes = {c: [] for c in self.unique}
+        self.outliers = {c: 0 for c in self.zscore_columns}
+
+    def numeric_matrix(self, chunk, columns=None):
+        """Numeric columns of a chunk as one float matrix (text is coerced, bad values -> NaN)."""
+        columns = columns or self.numeric
+        return np.column_stack([
+            pd.to_numeric(chunk[c], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+            if c in chunk.columns else np.full(len(chunk), np.nan)
+            for c in columns
+        ]) if columns else np.empty((len(chunk), 0))
+
+    def update(self, chunk):
+        """Evaluate every rule on one chunk; returns the numeric matrix for reuse."""
+        self.rows += len(chunk)
+        self.missing = self.missing.add(chunk.reindex(columns=self.columns).isna().sum(), fill_value=0)
+
+        values = self.numeric_matrix(chunk)
+        if self.numeric:
+            present = ~np.isnan(values)
+            raw_present = chunk.reindex(columns=self.numeric).notna().to_numpy()
+            # text values that could not be parsed; blank strings count as missing, not as type errors
+            blanks = np.column_stack([
+                chunk[c].astype("string").str.strip().eq("").fillna(False).to_numpy(dtype=bool)
+                if c in chunk.columns and not pd.api.types.is_numeric_dtype(chunk[c])
+                else np.zeros(len(chunk), dtype=bool)
+                for c in self.numeric
+            ])
+            self.bad_type += (raw_present & ~present & ~blanks).sum(axis=0)
+            self.missing[self.numeric] += blanks.sum(axis=0)
+
+            filled = np.where(present, values, 0.0)
+            self.count += present.sum(axis=0)
+            self.total += filled.sum(axis=0)
+            self.total_sq += (filled ** 2).sum(axis=0)
+            self.below += (present & (values < self.lower)).sum(axis=0)
+            self.above += (present & (values > self.upper)).sum(axis=0)
+
+        for col in self.categorical:
+            if col in chunk.columns:
+                values_col = chunk[col]
+                self.not_allowed[col] += int((values_col.notna() & ~values_col.isin(self.rules[col]["allowed"])).sum())
+
+        for col in self.unique:
+            if col in chunk.columns:
+                keys = chunk[col].dropna()
+                self.key_hashes[col].append(pd.util.hash_pandas_object(keys, index=False).to_numpy())
+        return values
+
+    def moments(self):
+        """Mean and sample standard deviation of every numeric column."""
+        count = np.maximum(self.count, 1)
+        mean = self.total / count
+        var = (self.total_sq - count * mean ** 2) / np.maximum(self.count - 1, 1)
+        return mean, np.sqrt(np.maximum(var, 0.0))
+
+    def count_outliers(self, values, columns=None):
+        """Add z-score outliers of a numeric matrix (columns = zscore columns or all numeric)."""
+        columns = columns or self.numeric
+        mean, std = self.moments()
+        index = [self.numeric.index(c) for c in columns]
+        for j, col in enumerate(columns):
+            if col not in self.outliers or std[index[j]] == 0:
+                continue
+            z = np.abs((values[:, j] - mean[index[j]]) / std[index[j]])
+            self.outliers[col] += int(np.nansum(z > self.rules[col]["zscore"]))
+
+    def results(self, name):
+        results = []
+        for col, cnt in self.missing.items():
+            if cnt > 0:
+                results.append(RuleResult(name, col, "missing_values", int(cnt)))
+        for col, hashes in self.key_hashes.items():
+            if hashes:
+                _, counts = np.unique(np.concatenate(hashes), return_counts=True)
+                dup = int((counts - 1).sum())
+                if dup > 0:
+                    results.append(RuleResult(name, col, "duplicate_key", dup))
+        for i, col in enumerate(self.numeric):
+            if self.bad_type[i] > 0:
+                results.append(RuleResult(name, col, "unexpected_type", int(self.bad_type[i])))
+            if self.below[i] > 0:
+                issue = "negative_value" if self.lower[i] == 0 else "below_min"
+                results.append(RuleResult(name, col, issue, int(self.below[i])))
+            if self.above[i] > 0:
+                results.append(RuleResult(name, col, "above_max", int(self.above[i])))
+            if self.outliers.get(col, 0) > 0:
+                results.append(RuleResult(name, col, "outliers", self.outliers[col]))
+        for col, cnt in self.not_allowed.items():
+            if cnt > 0:
+                results.append(RuleResult(name, col, "unexpected_category", cnt))
+        return results
+
+
+class ValidationEngine:
+    """
+    Evaluate a declarative schema (see TELCO_SCHEMA) on a DataFrame or a data file.
+    - in memory: one vectorized pass over all rules
+    - chunked (files larger than memory): one pass for all rules, plus a second pass
+      reading only the z-score columns to count outliers once mean/std are known
+    """
+
+    def __init__(self, schema=None):
+        self.schema = TELCO_SCHEMA if schema is None else schema
+        self.rows_checked = 0
+
+    def rules_for(self, sample):
+        """Schema rules for the columns of `sample`; unknown columns get default rules."""
+        rules = {}
+        for col in sample.columns:
+            if col in self.schema:
+                rules[col] = self.schema[col]
+            elif pd.api.types.is_numeric_dtype(sample[col]):
+                rules[col] = DEFAULT_NUMERIC_RULE
+            else:
+                rules[col] = DEFAULT_TEXT_RULE
+        return rules
+
+    def validate_frame(self, df, name="data"):
+        acc = _Accumulator(self.rules_for(df))
+        values = acc.update(df)
+        acc.count_outliers(values)
+        self.rows_checked = acc.rows
+        return acc.results(name)
+
+    def validate_file(self, path, name=None, chunksize=CHUNK_SIZE):
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        acc = None
+        for chunk in iter_frames(path, chunksize=chunksize):
+            if acc is None:
+                acc = _Accumulator(self.rules_for(chunk))
+            acc.update(chunk)
+        if acc is None:
+            return []
+        self.rows_checked = acc.rows
+        if acc.zscore_columns:
+            for chunk in iter_frames(path, columns=acc.zscore_columns, chunksize=chunksize):
+                acc.count_outliers(acc.numeric_matrix(chunk, acc.zscore_columns), acc.zscore_columns)
+        return acc.results(name)
+
+    def validate_path(self, path, name=None, chunksize=CHUNK_SIZE):
+        """Validate in memory when the file is small, chunk by chunk otherwise."""
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        if os.path.getsize(path) > IN_MEMORY_LIMIT_BYTES:
+            return self.validate_file(path, name, chunksize)
+        return self.validate_frame(read_frame(path), name)
@@ -1,59 +1,47 @@
 import os
-import logging
+import json
 from datetime import datetime
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 
-# Logging
-logging.basicConfig(filename="ingestion.log", level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+from src.storage.intermediate import data_path
+from src.validation.rules import ValidationEngine
+from src.monitoring.drift import load_batch_profile
+from src.pipeline.cache import write_run_manifest
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_rows, record_files
 
-MERGED_FILE = "./processed/merged_churn.csv"
+logger = get_logger(__name__)
 
-def validate():
+MERGED_FILE = data_path("data/processed/merged_churn")
+LATEST_REPORT_FILE = os.path.join("reports", "data_quality_latest.json")   # run manifest of the last validation
+
+@instrumented("validate")
+def validate(chunksize=None):
     """
-    Validate merged churn data:
+    Validate merged churn data against the declarative schema in rules.py:
     - missing values
-    - duplicated rows
+    - uniqueness of customerID
     - numeric range checks
-    - data type checks
+    - data type checks (including numbers stored as text)
+    - allowed category values
     - simple anomaly/outlier detection (z-score > 3)
-    - PDF data quality report
+    - PDF + JSON data quality report
+    - column profile (counts, distinct values, quantiles, top categories) read from the
+      sketches built during ingestion, without another pass over the data
+    All rules are evaluated in one vectorized pass; large files (or chunksize=N)
+    are streamed chunk by chunk. Returns the list of failed rules.
     """
     if not os.path.exists(MERGED_FILE):
-        logging.error(f"Merged file not found: {MERGED_FILE}")
+        logger.error(f"Merged file not found: {MERGED_FILE}")
         return
 
-    df = pd.read_csv(MERGED_FILE)
-    issues = []
-
-    # 1. Missing values
-    miss = df.isnull().sum()
-    for col, cnt in miss.items():
-        if cnt > 0:
-            issues.append(("merged_churn", col, "missing_values", int(cnt)))
-
-    # 2. Duplicate rows
-    dup = int(df.duplicated().sum())
-    if dup > 0:
-        issues.append(("merged_churn", "ALL", "duplicate_rows", dup))
-
-    # 3. Data type / range / outlier checks
-    for col in df.columns:
-        if df[col].dtype in ["int64", "float64"]:
-            # Range check (>= 0)
-            if (df[col] < 0).any():
-                issues.append(("merged_churn", col, "negative_value", int((df[col] < 0).sum())))
-            # Outlier check (z-score > 3)
-            if df[col].std() > 0:  # avoid division by zero
-                z_scores = np.abs((df[col] - df[col].mean()) / df[col].std())
-                out_count = int((z_scores > 3).sum())
-                if out_count > 0:
-                    issues.append(("merged_churn", col, "outliers", out_count))
-        else:
-            if not pd.api.types.is_string_dtype(df[col]):
-                issues.append(("merged_churn", col, "unexpected_type", str(df[col].dtype)))
+    engine = ValidationEngine()
+    if chunksize:
+        issues = engine.validate_file(MERGED_FILE, name="merged_churn", chunksize=chunksize)
+    else:
+        issues = engine.validate_path(MERGED_FILE, name="merged_churn")
+    record_rows(rows_in=engine.rows_checked)
+    record_files(read=[MERGED_FILE])
 
     # ------ Generate PDF report ------
     report_path = f"data_quality_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -71,7 +59,19 @@ def validate():
     plt.savefig(report_path, bbox_inches="tight")
     plt.close()
 
-    logging.info(f"✅ Data validation completed. Report written to: {report_path}")
+    written = [report_path, report_path.replace(".pdf", ".json")]
+    with open(written[1], "w") as f:
+        json.dump([issue._asdict() for issue in issues], f, indent=2)
+
+    profile = load_batch_profile(MERGED_FILE)
+    if profile is not None:
+        written.append(report_path.replace(".pdf", "_profile.json"))
+        with open(written[-1], "w") as f:
+            json.dump(profile.summary(), f, indent=2)
+    write_run_manifest(LATEST_REPORT_FILE, written, issues=len(issues))
+
+    logger.info(f"✅ Data validation completed. Report written to: {report_path}")
+    return issues
 
 if __name__ == "__main__":
     validate()
@@ -1,68 +1,124 @@
+"""
+In-process DVC versioning of the raw and merged churn data.
+
+Only new or changed files are hashed and added, in one batch through the DVC Python
+API (no `dvc` subprocess per file). A file is unchanged when its `.dvc` pointer still
+matches its size and mtime, or when its content hash (cached by size + mtime in the
+pipeline hash cache) equals the pointer's. Each run that versions something writes one
+JSON manifest and commits only the pointers, their .gitignore files and the manifest.
+"""
 import os
-import subprocess
+import json
 from datetime import datetime
 
+from src.storage.intermediate import data_path, is_data_file
+from src.pipeline.cache import StageCache, dvc_md5, file_fingerprint, read_dvc_pointer
+from src.instrumentation.logs import get_logger
+from src.instrumentation.stage_metrics import instrumented, record_files
+
+logger = get_logger(__name__)
+
+RAW_DIR = "raw_data"
+MERGED_FILE = data_path("data/processed/merged_churn")
+METADATA_DIR = os.path.join("src", "versioning", "metadata")
+DESCRIPTIONS = {
+    RAW_DIR: "Raw churn data ingested from source",
+    MERGED_FILE: "Merged churn data for preprocessing & modeling",
+}
+
+
 # ------------------------------
-# Helper: run shell commands
+# Initialize DVC if not already
 # ------------------------------
-def run_cmd(cmd):
-    """Run shell command with logging"""
-    print(f"👉 Running: {cmd}")
-    subprocess.run(cmd, shell=True, check=True)
+def open_repo():
+    """The project's DVC repo (initialized, and the init committed, on first use)."""
+    from dvc.repo import Repo
+
+    if os.path.exists(".dvc"):
+        return Repo(".")
+    repo = Repo.init(".")
+    repo.scm.add([".dvc", ".dvcignore"])
+    repo.scm.commit("Initialize DVC repository")
+    logger.info("DVC repository initialized")
+    return repo
+
 
 # ------------------------------
-# Initialize DVC if not already
+# Change detection
 # ------------------------------
-def init_dvc():
-    if not os.path.exists(".dvc"):
-        run_cmd("dvc init")
-        run_cmd("git add .dvc .gitignore")
-        run_cmd('git commit -m "Initialize DVC repository"')
-    else:
-        print("✅ DVC already initialized.")
+def files_to_track(raw_dir=RAW_DIR, merged_file=MERGED_FILE):
+    """(path, description) of every raw data file plus the merged file."""
+    files = []
+    if os.path.isdir(raw_dir):
+        files = [(os.path.join(raw_dir, f), DESCRIPTIONS[RAW_DIR])
+                 for f in sorted(os.listdir(raw_dir)) if is_data_file(f)]
+    if os.path.exists(merged_file):
+        files.append((merged_file, DESCRIPTIONS[MERGED_FILE]))
+    return files
+
+
+def needs_add(path, state):
+    """True if `path` has no DVC pointer or its content differs from the pointer's hash."""
+    if dvc_md5(path) is not None:   # pointer matches size + mtime: nothing is read
+        return False
+    recorded = read_dvc_pointer(path)
+    if recorded is None:
+        return True
+    return file_fingerprint(path, state) != recorded[0]
+
 
 # ------------------------------
 # Track files with metadata
 # ------------------------------
-def track_dvc(metadata_dir="src/versioning/metadata"):
-    os.makedirs(metadata_dir, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    # 1️⃣ Dynamically find all CSVs in raw_data/
-    raw_dir = "raw_data"
-    raw_files = [os.path.join(raw_dir, f) for f in os.listdir(raw_dir) if f.endswith(".csv")]
-
-    # 2️⃣ Add merged CSV
-    merged_csv = "data/processed/merged_churn.csv"
-    files_to_track = [(f, "Raw churn CSV ingested from source") for f in raw_files]
-    if os.path.exists(merged_csv):
-        files_to_track.append((merged_csv, "Merged churn CSV for preprocessing & modeling"))
-
-    if not files_to_track:
-        print("⚠ No files found to track in DVC. Ensure ingestion.py has run.")
-        return
-
-    # 3️⃣ Track files and generate metadata
-    for file_path, description in files_to_track:
-        if os.path.exists(file_path):
-            run_cmd(f"dvc add {file_path}")
-            base_name = os.path.basename(file_path).replace(".", "_")
-            meta_file = os.path.join(metadata_dir, f"{base_name}_version_{ts}.txt")
-            with open(meta_file, "w") as f:
-                f.write(f"File: {file_path}\n")
-                f.write(f"Description: {description}\n")
-                f.write(f"Timestamp: {ts}\n")
-            print(f"✅ Metadata written: {meta_file}")
-        else:
-            print(f"⚠ File not found, skipping: {file_path}")
-
-    # 4️⃣ Commit DVC changes and metadata to Git
-    run_cmd("git add .")
-    run_cmd(f'git commit -m "DVC: data versioning update at {ts}"')
+@instrumented("version")
+def track_dvc(metadata_dir=METADATA_DIR, files=None):
+    """
+    Batch-add new/changed data files to DVC, write one manifest for the run and commit
+    only the DVC pointers, their .gitignore files and the manifest. Returns the manifest
+    path (None when everything was already versioned).
+    """
+    files = files if files is not None else files_to_track()
+    if not files:
+        logger.warning("No files found to track in DVC. Ensure ingestion has run.")
+        return None
+
+    cache = StageCache()
+    changed = [(path, desc) for path, desc in files if needs_add(path, cache.state)]
+    cache.save_state()
+    if not changed:
+        logger.info(f"DVC: all {len(files)} data files already versioned")
+        print("✅ DVC versioning up to date.")
+        return None
+
+    repo = open_repo()
+    try:
+        repo.add([path for path, _ in changed])
+
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        manifest = {"timestamp": ts, "files": []}
+        for path, description in changed:
+            md5, size = read_dvc_pointer(path)
+            manifest["files"].append({"file": path, "description": description, "md5": md5, "size": size})
+        os.makedirs(metadata_dir, exist_ok=True)
+        manifest_path = os.path.join(metadata_dir, f"manifest_{ts}.json")
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        pointers = [f"{path}.dvc" for path, _ in changed]
+        ignores = sorted({os.path.join(os.path.dirname(path), ".gitignore") for path, _ in changed})
+        repo.scm.add(pointers + [p for p in ignores if os.path.exists(p)] + [manifest_path])
+        repo.scm.commit(f"DVC: data versioning update at {ts}")
+    finally:
+        repo.close()
+
+    record_files(read=[path for path, _ in changed], written=pointers + [manifest_path])
+    logger.info(f"DVC: versioned {len(changed)} of {len(files)} data files, manifest: {manifest_path}")
+    print(f"✅ DVC versioned {len(changed)} files. Manifest: {manifest_path}")
+    return manifest_path
+
 
 # ------------------------------
 # Main execution
 # ------------------------------
 if __name__ == "__main__":
-    init_dvc()
     track_dvc()
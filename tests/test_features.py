@@ -0,0 +1,40 @@
+"""Feature engineering: registry features in original units, clean columns passed through."""
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from src.storage.intermediate import write_frame, read_frame
+from src.preprocessing.preprocess import preprocess, MERGED_FILE, CLEAN_FILE
+from src.feature_engineering.features import feature_engineering, TRANSFORMED_DB
+from src.feature_engineering.registry import FEATURES
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), "..", "Telco-Customer-Churn.csv")
+
+
+@pytest.fixture
+def raw(tmp_path, monkeypatch):
+    df = pd.read_csv(SOURCE_CSV, nrows=500)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.dirname(MERGED_FILE))
+    write_frame(df, MERGED_FILE)
+    preprocess()
+    return df
+
+
+def test_feature_table_has_clean_columns_and_raw_unit_features(raw):
+    feature_engineering()
+    with sqlite3.connect(TRANSFORMED_DB) as con:
+        table = pd.read_sql('SELECT * FROM customer_features', con).set_index("customerID")
+    clean = read_frame(CLEAN_FILE).set_index("customerID")
+    raw = raw.set_index("customerID").loc[table.index]
+
+    assert set(clean.columns) <= set(table.columns)   # one-hot columns, scaled numerics and Churn
+    assert (table["Churn"] == clean.loc[table.index, "Churn"]).all()
+    assert {f.name for f in FEATURES} <= set(table.columns)
+    assert (table["long_term_customer"] == (raw["tenure"] > 24).astype(int)).all()
+    assert table["long_term_customer"].any()
+    assert table["tenure_years"].to_numpy() == pytest.approx(raw["tenure"].to_numpy() / 12.0, rel=1e-5)
+    assert table["total_spend"].to_numpy() == pytest.approx(
+        (raw["MonthlyCharges"] * raw["tenure"]).to_numpy(), rel=1e-5)
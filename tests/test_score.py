@@ -0,0 +1,19 @@
+"""Batch scoring helpers: model discovery."""
+import os
+import time
+
+from src.modeling.artifacts import MANIFEST_FILE
+from src.scoring.score import latest_model_path
+
+
+def test_legacy_pickles_are_only_used_without_bundles(tmp_path):
+    legacy = tmp_path / "XGBoost_churn_model.pkl"
+    legacy.write_bytes(b"")
+    assert latest_model_path(str(tmp_path)) == str(legacy)
+
+    bundle = tmp_path / "bundles" / "XGBoost_20260101_000000_000000"
+    bundle.mkdir(parents=True)
+    (bundle / MANIFEST_FILE).write_text("{}")
+    later = time.time() + 60
+    os.utime(legacy, (later, later))   # a newer legacy pickle does not win over a bundle
+    assert latest_model_path(str(tmp_path)) == str(bundle)
@@ -0,0 +1,125 @@
+"""Micro-batched scoring server: request validation and isolation of batched requests."""
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.preprocessing.preprocess import ChurnPreprocessor, encode_target
+from src.modeling.artifacts import save_bundle
+from src.scoring.score import ChurnScorer, LatencyTracker
+from src.scoring.server import MicroBatcher, make_handler
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), "..", "Telco-Customer-Churn.csv")
+
+
+@pytest.fixture(scope="module")
+def customers():
+    return pd.read_csv(SOURCE_CSV, nrows=1000)
+
+
+@pytest.fixture(scope="module")
+def scorer(customers, tmp_path_factory):
+    work_dir = tmp_path_factory.mktemp("model")
+    preprocessor = ChurnPreprocessor().fit(customers)
+    preprocessor_path = preprocessor.save(str(work_dir / "preprocessor.joblib"))
+    feature_names = list(preprocessor.get_feature_names_out())
+    X = pd.DataFrame(preprocessor.transform(customers).toarray(), columns=feature_names)
+    model = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, encode_target(customers["Churn"]))
+    bundle = save_bundle(model, "RandomForest", feature_names=feature_names,
+                         preprocessor_path=preprocessor_path, bundle_dir=str(work_dir))
+    return ChurnScorer(model_path=bundle)
+
+
+@pytest.fixture
+def server(scorer):
+    # a long batching window so that concurrent test requests land in one batch
+    batcher = MicroBatcher(scorer, max_wait_ms=500)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher, LatencyTracker()))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def post(url, payload):
+    request = urllib.request.Request(f"{url}/score", data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def post_concurrently(url, payloads):
+    results = [None] * len(payloads)
+    barrier = threading.Barrier(len(payloads))
+
+    def send(i):
+        barrier.wait()
+        results[i] = post(url, payloads[i])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(len(payloads))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def records(df):
+    return json.loads(df.to_json(orient="records"))
+
+
+def expected_probability(scorer, record):
+    return float(scorer.score_frame(pd.DataFrame([record]))["churn_probability"].iloc[0])
+
+
+def test_malformed_request_does_not_affect_concurrent_request(server, scorer, customers):
+    valid = records(customers.iloc[[3]])[0]
+    (bad_status, bad_body), (status, body) = post_concurrently(server, [{"rows": [[1, 2, 3]]}, valid])
+
+    assert bad_status == 400 and "not an object" in bad_body["error"]
+    assert status == 200
+    [score] = body["scores"]
+    assert score["customerID"] == valid["customerID"]
+    assert score["churn_probability"] == pytest.approx(expected_probability(scorer, valid), abs=1e-6)
+
+
+@pytest.mark.parametrize("payload", [{"rows": ["abc"]}, {"rows": []}, {"rows": "abc"}, [None]])
+def test_rows_that_are_not_objects_are_rejected(server, payload):
+    status, body = post(server, payload)
+    assert status == 400
+
+
+def test_rows_missing_input_columns_are_rejected(server, customers):
+    row = records(customers.iloc[[0]])[0]
+    del row["Contract"]
+    status, body = post(server, {"rows": [row]})
+    assert status == 400 and "Contract" in body["error"]
+
+
+def test_batched_requests_are_scored_independently(server, scorer, customers):
+    first = records(customers.iloc[[0, 1]])
+    # same columns in another order, one null value (imputed) and an extra key
+    second = [{k: row[k] for k in reversed(list(row))} for row in records(customers.iloc[[2]])]
+    second[0]["TotalCharges"] = None
+    second[0]["note"] = "ignored"
+    calls_before = scorer.latency.summary()["calls"]
+
+    (status_1, body_1), (status_2, body_2) = post_concurrently(server, [{"rows": first}, {"rows": second}])
+
+    assert status_1 == status_2 == 200
+    assert scorer.latency.summary()["calls"] == calls_before + 1   # one model call for both requests
+    for rows, body in ((first, body_1), (second, body_2)):
+        assert [s["customerID"] for s in body["scores"]] == [r["customerID"] for r in rows]
+        expected = [expected_probability(scorer, r) for r in rows]
+        np.testing.assert_allclose([s["churn_probability"] for s in body["scores"]], expected, atol=1e-6)
@@ -0,0 +1,32 @@
+"""Cross-validated model selection: fold result cache contents and bounds."""
+import os
+
+import joblib
+import numpy as np
+from sklearn.datasets import make_classification
+from sklearn.linear_model import LogisticRegression
+
+import src.modeling.selection as selection
+
+
+def test_cache_keeps_scores_only_and_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)   # fold metrics go to reports/metrics/ in the working directory
+    X, y = make_classification(300, 8, random_state=0)
+    cache_dir = str(tmp_path / "cv_cache")
+    models = {"LogisticRegression": LogisticRegression(max_iter=200)}
+
+    first = selection.select_model(models, X, y, n_folds=3, cache_dir=cache_dir)
+    entries = sorted(os.listdir(cache_dir))
+    assert len(entries) == 3
+    entry = joblib.load(os.path.join(cache_dir, entries[0]))
+    assert set(entry) == {"metrics", "fit_seconds", "proba"}   # no fitted estimator
+    assert entry["proba"].dtype == np.float32 and len(entry["proba"]) == 100
+
+    second = selection.select_model(models, X, y, n_folds=3, cache_dir=cache_dir)
+    assert second[0] == first[0]
+    assert sorted(os.listdir(cache_dir)) == entries   # reused, not refitted
+
+    monkeypatch.setattr(selection, "CV_CACHE_MAX_ENTRIES", 4)
+    selection.select_model({"LogisticRegression": LogisticRegression(C=0.1, max_iter=200)}, X, y,
+                           n_folds=3, cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 4